@@ -1,16 +1,27 @@
 from textual.app import App, ComposeResult
 from textual.screen import Screen
 from textual.containers import Container, Vertical
-from textual.widgets import Static, Input, Button, Footer, Label
+from textual.widgets import Static, Input, Button, Footer, Label, RichLog
+from textual.css.query import NoMatches
 from rich.text import Text
-import subprocess
+from typing import Awaitable, Callable
 import sys
+import os
+import time
+import tempfile
 import asyncio
-import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pippilot import Engine, INSTALL, UNINSTALL, outdated
+from pippilot.tracing import tracer, span
+from pippilot.tasks import CancelToken, Cancelled
+from pippilot.metadata import format_info
+from pippilot.upgrade import ResolutionError
 
 VERSION = "0.1"
 DEVELOPER = "Rico"
 GITHUB_URL = "https://github.com/mambuzrrr/pipPilot"
+MAX_LOG_LINES = 5000
 
 class PipPilotApp(App):
     CSS = """
@@ -84,7 +95,26 @@ class PipPilotApp(App):
         color: #f5c2e7;
     }
     """
-    BINDINGS = [("q", "quit", "Quit")]
+    BINDINGS = [("q", "quit", "Quit"), ("t", "export_trace", "Trace")]
+
+    def __init__(self):
+        super().__init__()
+        self.engine = Engine(sys.executable)
+
+    def on_unmount(self) -> None:
+        # stops the wheel prefetches, which would otherwise keep the process alive after quitting
+        self.engine.close()
+
+    def action_export_trace(self) -> None:
+        # first press starts recording (unless PIPPILOT_TRACE already did), the next one writes the file
+        if not tracer.enabled:
+            tracer.enabled = True
+            self.notify("Tracing enabled, press t again to export the timeline.")
+            return
+        try:
+            self.notify(f"Trace written to {tracer.export()}")
+        except OSError as e:
+            self.notify(f"Could not write trace: {e}", severity="error")
 
     def compose(self) -> ComposeResult:
         yield Container(
@@ -125,6 +155,92 @@ class PipPilotApp(App):
             case _:
                 pass
 
+class LogScreen(Screen):
+    # Runs an async job and streams its output into a bounded log, flushed once per frame
+    def __init__(self, title: str, job: Callable[[], Awaitable[None]]):
+        super().__init__()
+        self.title_text = title
+        self.job = job
+        self.token = CancelToken()
+        self._pending = []
+
+    def compose(self) -> ComposeResult:
+        yield Label(self.title_text, id="prompt")
+        yield RichLog(id="output", max_lines=MAX_LOG_LINES, wrap=True)
+        yield Button("Cancel", id="cancel")
+        yield Button("Back", id="back")
+        yield Static(f"v{VERSION} by {DEVELOPER}", id="status")
+        yield Footer()
+
+    def on_mount(self) -> None:
+        self.set_interval(1 / 30, self._flush)
+        self.run_worker(self._run_job(), exclusive=True)
+
+    async def _run_job(self) -> None:
+        started = time.perf_counter()
+        try:
+            with span(type(self).__name__):
+                await self.job()
+        except Cancelled:
+            pass
+        except Exception as e:
+            self.log_line(f"❌ Error: {e}")
+        finally:
+            if tracer.enabled:
+                self.log_line(f"\n{tracer.summary(started)}")
+            try:
+                self._flush()
+                self.query_one("#cancel", Button).disabled = True
+            except NoMatches:
+                pass  # Back was pressed: the screen's widgets are already gone
+
+    def log_line(self, line: str) -> None:
+        self._pending.append(line)
+        if len(self._pending) > MAX_LOG_LINES:
+            del self._pending[:-MAX_LOG_LINES]
+
+    def _flush(self) -> None:
+        if self._pending:
+            lines, self._pending = self._pending, []
+            self.query_one(RichLog).write("\n".join(lines))
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.cancelled
+
+    async def run_pip(self, action: str, packages: list, upgrade: bool = True) -> int:
+        # the engine terminates pip (and kills it if it lingers) once the token is cancelled
+        return await self.app.engine.execute(action, packages, self.log_line, token=self.token, upgrade=upgrade)
+
+    async def install_targets(self, targets: list) -> int:
+        return await self.app.engine.install(targets, self.log_line, token=self.token)
+
+    async def _cancel(self) -> None:
+        if not self.token.cancelled and not self.query_one("#cancel", Button).disabled:
+            self.token.cancel()
+            self.log_line("⛔ Cancelled.")
+
+    async def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == "cancel":
+            await self._cancel()
+        elif event.button.id == "back":
+            await self._cancel()
+            self.app.pop_screen()
+
+class PipScreen(LogScreen):
+    def __init__(self, title: str, action: str, packages: list, upgrade: bool = True):
+        super().__init__(title, self._pip)
+        self.action = action
+        self.packages = packages
+        self.upgrade = upgrade and action == INSTALL
+
+    async def _pip(self) -> None:
+        flags = " --upgrade" if self.upgrade else " -y" if self.action == UNINSTALL else ""
+        self.log_line(f"$ pip {self.action}{flags} {' '.join(self.packages)}")
+        code = await self.run_pip(self.action, self.packages, self.upgrade)
+        if not self.cancelled:
+            self.log_line("✅ Success.\n" if code == 0 else f"❌ Exited with code {code}.\n")
+
 class PackageInputScreen(Screen):
     def __init__(self, mode: str):
         super().__init__()
@@ -145,26 +261,10 @@ class PackageInputScreen(Screen):
             pkg = self.query_one(Input).value.strip()
             if not pkg:
                 return
-            await self.app.push_screen(OutputScreen(f"Running pip {self.mode} on '{pkg}'...\n"))
-            result = await asyncio.to_thread(self._run_pip, pkg)
-            await self.app.push_screen(OutputScreen(result))
-
-    def _run_pip(self, pkg: str) -> str:
-        args = (["install", pkg] if self.mode == "install"
-                else ["install", "--upgrade", pkg] if self.mode == "update"
-                else ["uninstall", "-y", pkg])
-        try:
-            output = subprocess.check_output(
-                [sys.executable, "-m", "pip"] + args,
-                stderr=subprocess.STDOUT,
-                text=True,
-                timeout=60
-            )
-            return f"✅ Success:\n{output}"
-        except subprocess.TimeoutExpired:
-            return "❌ Error: pip command timed out."
-        except subprocess.CalledProcessError as e:
-            return f"❌ Error:\n{e.output}"
+            action = UNINSTALL if self.mode == "uninstall" else INSTALL
+            # "install" leaves an installed package at its version; "update" upgrades it
+            await self.app.push_screen(PipScreen(f"Running pip {self.mode} on '{pkg}'...", action, [pkg],
+                                                 upgrade=self.mode == "update"))
 
 class FindPackageScreen(Screen):
     def compose(self) -> ComposeResult:
@@ -182,32 +282,30 @@ class FindPackageScreen(Screen):
             pkg = self.query_one(Input).value.strip()
             if not pkg:
                 return
-            await self.app.push_screen(OutputScreen(f"Searching for '{pkg}'...\n"))
-            result = await asyncio.to_thread(self._search_pkg, pkg)
-            await self.app.push_screen(OutputScreen(result))
+            await self.app.push_screen(PackageInfoScreen(pkg))
 
-    def _search_pkg(self, pkg: str) -> str:
-        try:
-            show = subprocess.check_output(
-                [sys.executable, "-m", "pip", "show", pkg],
-                stderr=subprocess.DEVNULL,
-                text=True
-            )
-            installed = next((l.split(":",1)[1].strip()
-                              for l in show.splitlines() if l.startswith("Version")), "Unknown")
-        except Exception:
-            installed = "Not installed"
-        try:
-            latest = subprocess.check_output(
-                [sys.executable, "-m", "pip", "index", "versions", pkg],
-                stderr=subprocess.DEVNULL,
-                text=True
-            )
-        except Exception:
-            latest = "Could not fetch latest version."
-        return f"📦 Package: {pkg}\nInstalled: {installed}\n\n{latest}"
+class PackageInfoScreen(LogScreen):
+    # Installed details come from the dist-info metadata, the latest version from the cached index lookup
+    def __init__(self, package: str):
+        super().__init__(f"📦 Package: {package}", self._show_info)
+        self.package = package
+
+    async def _show_info(self) -> None:
+        engine = self.app.engine
+        await engine.scan()
+        info, latest = await asyncio.gather(engine.info(self.package), engine.latest_version(self.package))
+        if info is None:
+            self.log_line(f"⚠️ {self.package} is not installed.")
+            self.log_line(f"Latest version: {latest}" if latest else "❌ Not found on the package index.")
+            return
+        for line in format_info(info, latest):
+            self.log_line(line)
 
 class ListPackagesScreen(Screen):
+    def __init__(self):
+        super().__init__()
+        self.token = CancelToken()
+
     def compose(self) -> ComposeResult:
         yield Static("Fetching installed packages...", id="output")
         yield Button("Back", id="back")
@@ -215,103 +313,99 @@ class ListPackagesScreen(Screen):
         yield Footer()
 
     async def on_mount(self) -> None:
-        result = await asyncio.to_thread(self._get_package_list_with_updates)
-        self.query_one("#output", Static).update(result)
+        self.query_one("#output", Static).update(await self._get_package_list_with_updates())
 
-    def _get_package_list_with_updates(self) -> Text:
+    async def _get_package_list_with_updates(self) -> Text:
+        engine = self.app.engine
+        engine.lookup.reset_stats()
+        started = time.perf_counter()
         try:
-            installed_raw = subprocess.check_output(
-                [sys.executable, "-m", "pip", "list", "--format=freeze"],
-                stderr=subprocess.STDOUT, text=True, timeout=30
-            )
-            outdated_raw = subprocess.check_output(
-                [sys.executable, "-m", "pip", "list", "--outdated", "--format=json"],
-                stderr=subprocess.STDOUT, text=True, timeout=30
-            )
-            outdated_json = json.loads(outdated_raw)
+            with span("ListPackagesScreen"):
+                statuses = await engine.check_outdated(await engine.scan(), token=self.token)
         except Exception as e:
             return Text(f"❌ Error fetching package list:\n{e}", style="bold red")
-
-        installed = {
-            name.lower(): ver
-            for name, ver in (line.split("==",1) for line in installed_raw.splitlines() if "==" in line)
-        }
-        outdated = {
-            pkg["name"].lower(): (pkg["version"], pkg["latest_version"])
-            for pkg in outdated_json
-        }
+        engine.prefetch(statuses)
 
         text = Text("Installed Packages:\n\n", style="bold")
-        for name, curr in sorted(installed.items()):
-            if name in outdated:
-                inst_v, lat_v = outdated[name]
-                text.append(f"{name} ", style="bold")
-                text.append(f"{inst_v}", style="red")
+        for status in sorted(statuses, key=lambda s: s.name.lower()):
+            if not status.uptodate:
+                text.append(f"{status.name} ", style="bold")
+                text.append(f"{status.version}", style="red")
                 text.append(" -> Can be updated to ")
-                text.append(f"{lat_v}\n", style="green")
+                text.append(f"{status.latest}\n", style="green")
             else:
-                text.append(f"{name} {curr}\n", style="white")
+                text.append(f"{status.name} {status.version}\n", style="white")
+        text.append(f"\n{engine.lookup.summary()}\n", style="dim")
+        if tracer.enabled:
+            text.append(f"{tracer.summary(started)}\n", style="dim")
         return text
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "back":
+            self.token.cancel()  # stop lookups still in flight
             self.app.pop_screen()
 
-class UpdateAllPackagesScreen(Screen):
-    def compose(self) -> ComposeResult:
-        yield Static("Starting update of all installed packages...\nPlease wait.", id="output")
-        yield Button("Back", id="back")
-        yield Static(f"v{VERSION} by {DEVELOPER}", id="status")
-        yield Footer()
+class UpdateAllPackagesScreen(LogScreen):
+    def __init__(self):
+        super().__init__("Updating all installed packages...", self._update_all)
 
-    async def on_mount(self) -> None:
-        result = await asyncio.to_thread(self._update_all_packages)
-        self.query_one("#output", Static).update(result)
+    async def _update_all(self) -> None:
+        timings = []
 
-    def _update_all_packages(self) -> str:
+        def phase(name, start):
+            timings.append(f"{name} {time.perf_counter() - start:.2f}s")
+
+        engine = self.app.engine
         try:
-            installed_raw = subprocess.check_output(
-                [sys.executable, "-m", "pip", "list", "--format=freeze"],
-                stderr=subprocess.STDOUT, text=True, timeout=60
-            )
-            packages = [line.split("==",1)[0] for line in installed_raw.splitlines() if "==" in line]
-
-            output = ""
-            for pkg in packages:
-                output += f"Updating {pkg}...\n"
-                try:
-                    out = subprocess.check_output(
-                        [sys.executable, "-m", "pip", "install", "--upgrade", pkg],
-                        stderr=subprocess.STDOUT, text=True, timeout=60
-                    )
-                    output += out + "\n"
-                except subprocess.CalledProcessError as e:
-                    output += f"Failed to update {pkg}:\n{e.output}\n"
-                except subprocess.TimeoutExpired:
-                    output += f"Timeout while updating {pkg}\n"
-            return output
-        except Exception as e:
-            return f"❌ Error during update:\n{e}"
+            start = time.perf_counter()
+            installed = await engine.scan()
+            phase("scan", start)
 
-    def on_button_pressed(self, event: Button.Pressed) -> None:
-        if event.button.id == "back":
-            self.app.pop_screen()
+            start = time.perf_counter()
+            pending = outdated(await engine.check_outdated(installed, token=self.token))
+            phase("check", start)
+            self.log_line(f"Checked {len(installed)} installed packages, {len(pending)} outdated.")
+            if not pending:
+                self.log_line("✅ Everything is up to date.")
+                return
+            for status in sorted(pending, key=lambda s: s.name.lower()):
+                self.log_line(f"  {status.name} {status.version} → {status.latest}")
+            if self.cancelled:
+                return
 
-class OutputScreen(Screen):
-    def __init__(self, text: str):
-        super().__init__()
-        self.text = text
+            start = time.perf_counter()
+            self.log_line("\nResolving...")
+            try:
+                plan = await engine.plan(sorted(s.name for s in pending))
+            except ResolutionError as e:
+                phase("resolve", start)
+                self.log_line(f"❌ Conflicts found, nothing was installed:\n{e}")
+                return
+            phase("resolve", start)
+            self.log_line(f"Resolved {len(plan)} distribution(s) to install:")
+            for item in plan:
+                self.log_line(f"  {item['name']} {item['version']}")
+            if not plan:
+                self.log_line("✅ pip found nothing to install.")
+                return
+            if self.cancelled:
+                return
 
-    def compose(self) -> ComposeResult:
-        yield Static(self.text, id="output", expand=True)
-        yield Button("Back", id="back")
-        yield Static(f"v{VERSION} by {DEVELOPER}", id="status")
-        yield Footer()
+            with tempfile.TemporaryDirectory() as tmp:
+                start = time.perf_counter()
+                self.log_line("\nDownloading...")
+                targets = await engine.download(plan, tmp)
+                phase(f"download ({len(targets)} files)", start)
+                if self.cancelled:
+                    return
 
-    def on_button_pressed(self, event: Button.Pressed) -> None:
-        if event.button.id == "back":
-            self.app.pop_screen()
-            self.app.pop_screen()
+                start = time.perf_counter()
+                code = await self.install_targets(targets)
+                phase("install", start)
+            if not self.cancelled:
+                self.log_line("✅ All packages updated." if code == 0 else f"❌ Install failed with exit code {code}.")
+        finally:
+            self.log_line("\n⏱ " + " · ".join(timings))
 
 if __name__ == "__main__":
     PipPilotApp().run()
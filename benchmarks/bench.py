@@ -0,0 +1,255 @@
+# bench.py
+import os, sys, json, time, asyncio, argparse, platform, statistics, subprocess, tempfile, importlib.util
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ["PIPPILOT_WHEELHOUSE"] = "0"  # no background pip downloads while timing
+from synthetic import make_site_packages
+from pippilot import Engine, pipmanager
+from pippilot.pypi import LookupEngine
+from pippilot.cache import MetadataCache
+
+GROUPS = ("scan", "loader", "gui", "cli")
+FILTER_QUERIES = ("synth", "pkg-01", "synht pkg", "bench group7", "zz-no-match")
+
+def start_stub(args, pins, outdated=None):
+    cmd = [sys.executable, os.path.join(HERE, "stubindex.py"), "--pins", pins,
+           "--latency", str(args.latency / 1000), "--error-rate", str(args.error_rate),
+           "--payload", str(args.payload), "--seed", str(args.seed),
+           "--outdated", str(args.outdated if outdated is None else outdated)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    url = proc.stdout.readline().strip()
+    return proc, url + ("/pypi" if args.protocol == "json" else "/simple")
+
+def fresh_scanners():
+    # every size gets its own PYTHONPATH, so the per-interpreter scanners must start over
+    with pipmanager._scanners_lock:
+        pipmanager._scanners.clear()
+
+def label(result):
+    return f"{result['bench']} [{result['query']}]" if "query" in result else result["bench"]
+
+class Recorder:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    def add(self, bench, size, runs, **extra):
+        self.results.append({
+            "bench": bench, "size": size, "runs": [round(r, 6) for r in runs],
+            "min": round(min(runs), 6), "median": round(statistics.median(runs), 6), **extra,
+        })
+        print(f"  {label(self.results[-1]):<30} n={size:<6} median {statistics.median(runs) * 1000:9.1f} ms", file=sys.stderr)
+
+    def measure(self, bench, size, fn, setup=None, **extra):
+        runs = []
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            fn()
+            runs.append(time.perf_counter() - start)
+        self.add(bench, size, runs, **extra)
+
+def bench_scan(rec, size):
+    rec.measure("scan.cold", size, lambda: pipmanager.get_installed_packages(sys.executable), setup=fresh_scanners)
+    rec.measure("scan.warm", size, lambda: pipmanager.get_installed_packages(sys.executable))
+
+def bench_loader(rec, size, url, workdir):
+    from main import LoaderThread
+    cache_path = os.path.join(workdir, "loader-cache.json")
+
+    def cold():
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+    def load():
+        engine = Engine(sys.executable, lookup=LookupEngine(url, cache=MetadataCache(path=cache_path)))
+        try:
+            LoaderThread(engine).run()
+        finally:
+            engine.close()
+
+    fresh_scanners()
+    rec.measure("loader.cold", size, load, setup=cold)
+    rec.measure("loader.warm", size, load)
+
+def bench_gui(rec, size, app):
+    from PyQt6.QtCore import QEventLoop
+    from main import GlobalPipPilot
+
+    def wait_loaded(window):
+        # _on_loaded hides the progress bar once the table has been filled
+        while not window.progress.isHidden():
+            app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 10)
+
+    fresh_scanners()
+    start = time.perf_counter()
+    window = GlobalPipPilot(sys.executable)
+    window.show()
+    wait_loaded(window)
+    rec.add("gui.startup", size, [time.perf_counter() - start], rows=window.model.rowCount())
+
+    def refresh():
+        window._load_packages()
+        wait_loaded(window)
+
+    rec.measure("gui.refresh", size, refresh)
+    for query in FILTER_QUERIES:
+        def search(query=query):
+            window.search.setText(query)
+            window._filter()
+        rec.measure("gui.filter", size, search, query=query)
+        rec.results[-1]["rows"] = window.proxy.rowCount()
+    window.search.setText("")
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+
+def load_cli():
+    spec = importlib.util.spec_from_file_location("pippilot_cli", os.path.join(ROOT, "CLI", "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+async def _run_screen(cli, make_screen, done):
+    app = cli.PipPilotApp()
+    async with app.run_test() as pilot:
+        start = time.perf_counter()
+        screen = make_screen(cli)
+        await app.push_screen(screen)
+        while not done(screen):
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - start
+        await pilot.pause()
+    app.engine.close()
+    return elapsed
+
+def bench_cli(rec, size, cli, args, workdir):
+    def listed(screen):
+        return "Installed Packages" in str(screen.query_one("#output").render())
+
+    def finished(screen):
+        return screen.query_one("#cancel").disabled
+
+    fresh_scanners()
+    runs = []
+    for i in range(args.repeat):
+        os.environ["XDG_CACHE_HOME"] = os.path.join(workdir, f"cache-cli-{i}")
+        runs.append(asyncio.run(_run_screen(cli, lambda m: m.ListPackagesScreen(), listed)))
+    rec.add("cli.list.cold", size, runs)
+    runs = [asyncio.run(_run_screen(cli, lambda m: m.ListPackagesScreen(), listed)) for _ in range(args.repeat)]
+    rec.add("cli.list.warm", size, runs)
+
+    # nothing is reported outdated here, so the screen stops after scan + check and never runs pip
+    proc, url = start_stub(args, os.path.join(workdir, "pins.json"), outdated=0.0)
+    os.environ["PIPPILOT_INDEX_URL"] = url
+    os.environ["XDG_CACHE_HOME"] = os.path.join(workdir, "cache-cli-update")
+    try:
+        runs = [asyncio.run(_run_screen(cli, lambda m: m.UpdateAllPackagesScreen(), finished)) for _ in range(args.repeat)]
+        rec.add("cli.update_check", size, runs)
+    finally:
+        proc.terminate()
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["bench"], r["size"], r.get("query")): r for r in json.load(f)["results"]}
+    print(f"{'bench':<30} {'size':>6} {'before':>10} {'after':>10} {'ratio':>7}", file=sys.stderr)
+    for r in current:
+        old = baseline.get((r["bench"], r["size"], r.get("query")))
+        if old and old["median"]:
+            print(f"{label(r):<30} {r['size']:>6} {old['median'] * 1000:9.1f}ms {r['median'] * 1000:9.1f}ms "
+                  f"{r['median'] / old['median']:6.2f}x", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="pipPilot scaling benchmarks")
+    parser.add_argument("--sizes", default="100,1000,5000", help="comma-separated distribution counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"comma-separated subset of {', '.join(GROUPS)}")
+    parser.add_argument("--latency", type=float, default=20.0, help="stub index latency in milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--payload", type=int, default=2048, help="approximate index response size in bytes")
+    parser.add_argument("--outdated", type=float, default=0.2)
+    parser.add_argument("--protocol", choices=("json", "simple"), default="json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="previous JSON report to compare medians against")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+    groups = [g for g in args.only.split(",") if g]
+
+    app = cli = None
+    if "gui" in groups or "loader" in groups:
+        try:
+            from PyQt6.QtWidgets import QApplication
+            app = QApplication.instance() or QApplication(sys.argv)
+        except ImportError:
+            print("PyQt6 is not installed, skipping loader and gui", file=sys.stderr)
+            groups = [g for g in groups if g not in ("gui", "loader")]
+    if "cli" in groups:
+        try:
+            cli = load_cli()
+        except ImportError:
+            print("textual is not installed, skipping cli", file=sys.stderr)
+            groups.remove("cli")
+
+    rec = Recorder(args.repeat)
+    started = time.time()
+    base_path = os.environ.get("PYTHONPATH")
+    # packages that are really installed are served at their installed version, so they are
+    # looked up like everything else but never show up as outdated
+    real = pipmanager.get_installed_packages(sys.executable)
+    for size in sizes:
+        print(f"{size} distributions", file=sys.stderr)
+        with tempfile.TemporaryDirectory(prefix="pippilot-bench-") as workdir:
+            site = os.path.join(workdir, "site-packages")
+            make_site_packages(site, size, seed=args.seed)
+            pins = os.path.join(workdir, "pins.json")
+            with open(pins, "w", encoding="utf-8") as f:
+                json.dump(real, f)
+            os.environ["PYTHONPATH"] = site + (os.pathsep + base_path if base_path else "")
+            proc, url = start_stub(args, pins)
+            os.environ["PIPPILOT_INDEX_URL"] = url
+            try:
+                if "scan" in groups:
+                    bench_scan(rec, size)
+                if "loader" in groups:
+                    bench_loader(rec, size, url, workdir)
+                if "gui" in groups:
+                    os.environ["XDG_CACHE_HOME"] = os.path.join(workdir, "cache-gui")
+                    bench_gui(rec, size, app)
+                if "cli" in groups:
+                    bench_cli(rec, size, cli, args, workdir)
+            finally:
+                proc.terminate()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+            "duration": round(time.time() - started, 3),
+            "params": {**vars(args), "sizes": sizes, "only": groups},
+        },
+        "results": rec.results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(rec.results, args.compare)
+
+if __name__ == "__main__":
+    main()
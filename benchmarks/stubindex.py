@@ -0,0 +1,123 @@
+# stubindex.py
+import re, sys, json, time, zlib, argparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+def normalize_name(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def _fraction(*parts):
+    # deterministic per name, so a run can be reproduced exactly
+    return zlib.crc32(":".join(map(str, parts)).encode()) / 2 ** 32
+
+class StubIndex(ThreadingHTTPServer):
+    # Serves /pypi/<name>/json and /simple/<name>/ for any name. Pinned names report their pinned
+    # version; the rest are synthetic packages installed at 1.0.0, a fraction of them with a 2.0.0 release.
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, error_rate=0.0, payload=0, outdated=0.2, pins=None, seed=0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.payload = payload
+        self.outdated = outdated
+        self.pins = {normalize_name(name): version for name, version in (pins or {}).items()}
+        self.seed = seed
+
+    def latest(self, name):
+        if name in self.pins:
+            return self.pins[name]
+        return "2.0.0" if _fraction("outdated", self.seed, name) < self.outdated else "1.0.0"
+
+    def handle_error(self, request, client_address):
+        # clients drop pooled keep-alive connections at exit; that isn't worth a traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def fails(self, name):
+        return _fraction("error", self.seed, name) < self.error_rate
+
+    def render_json(self, name, latest):
+        # padding goes after "info", like the release listing on a real index
+        releases, size = {}, 0
+        while size < self.payload:
+            version = f"{latest}.dev{len(releases)}"
+            releases[version] = [{"filename": f"{name}-{version}.tar.gz", "size": 1024, "yanked": False}]
+            size += 80 + 2 * len(name)
+        body = {"info": {"name": name, "version": latest, "summary": "stub"}, "last_serial": 1, "releases": releases}
+        return json.dumps(body).encode(), "application/json"
+
+    def render_simple(self, name, latest, accept):
+        count = max(1, self.payload // (60 + 2 * len(name)))
+        # filler releases are pre-releases of the latest version, so they never win
+        files = [f"{name}-{latest}.dev{k}.tar.gz" for k in range(count - 1)] + [f"{name}-{latest}.tar.gz"]
+        if "application/vnd.pypi.simple.v1+json" in accept:
+            body = {"meta": {"api-version": "1.0"}, "name": name,
+                    "files": [{"filename": f, "url": f"../../files/{f}", "hashes": {}} for f in files]}
+            return json.dumps(body).encode(), "application/vnd.pypi.simple.v1+json"
+        links = "".join(f'<a href="../../files/{f}">{f}</a><br/>' for f in files)
+        return f"<!DOCTYPE html><html><body>{links}</body></html>".encode(), "text/html"
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="text/plain", etag=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        parts = [p for p in self.path.split("?", 1)[0].split("/") if p]
+        if len(parts) == 3 and parts[0] == "pypi" and parts[2] == "json":
+            kind = "json"
+        elif len(parts) == 2 and parts[0] == "simple":
+            kind = "simple"
+        else:
+            return self._send(404, b"not found")
+        name = normalize_name(parts[1])
+        if server.fails(name):
+            return self._send(500, b"stub error")
+        latest = server.latest(name)
+        etag = f'"{latest}-{server.payload}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, content_type=None, etag=etag)
+        if kind == "json":
+            body, content_type = server.render_json(name, latest)
+        else:
+            body, content_type = server.render_simple(name, latest, self.headers.get("Accept", ""))
+        self._send(200, body, content_type, etag)
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub package index for pipPilot benchmarks")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of packages answered with HTTP 500")
+    parser.add_argument("--payload", type=int, default=0, help="approximate response size in bytes")
+    parser.add_argument("--outdated", type=float, default=0.2, help="fraction of packages with a newer release")
+    parser.add_argument("--pins", help="JSON file of {name: version} served as the latest version")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    pins = None
+    if args.pins:
+        with open(args.pins, encoding="utf-8") as f:
+            pins = json.load(f)
+    server = StubIndex(("127.0.0.1", args.port), args.latency, args.error_rate, args.payload, args.outdated, pins, args.seed)
+    print(f"http://127.0.0.1:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+# synthetic.py
+import os, re, random
+
+DESCRIPTION = "Synthetic distribution generated for pipPilot benchmarks.\n" * 40
+
+def synthetic_name(i):
+    # mix the spellings real projects use so normalization is exercised too
+    return (f"synth-pkg-{i:05d}", f"synth_pkg_{i:05d}", f"synth.pkg.{i:05d}", f"SynthPkg{i:05d}")[i % 4]
+
+def make_site_packages(root, count, version="1.0.0", deps=3, seed=0):
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    names = [synthetic_name(i) for i in range(count)]
+    for i, name in enumerate(names):
+        path = os.path.join(root, f"{re.sub(r'[-_.]+', '_', name)}-{version}.dist-info")
+        os.makedirs(path, exist_ok=True)
+        requires = rng.sample(names[:i], min(deps, i))
+        headers = [
+            "Metadata-Version: 2.1",
+            f"Name: {name}",
+            f"Version: {version}",
+            f"Summary: Synthetic package {i} for scaling benchmarks",
+            f"Keywords: synthetic,bench,group{i % 50}",
+            "License: MIT",
+            *(f"Requires-Dist: {req}" for req in requires),
+        ]
+        with open(os.path.join(path, "METADATA"), "w", encoding="utf-8") as f:
+            f.write("\n".join(headers) + "\n\n" + DESCRIPTION)
+        with open(os.path.join(path, "INSTALLER"), "w", encoding="utf-8") as f:
+            f.write("pip\n")
+        with open(os.path.join(path, "RECORD"), "w", encoding="utf-8") as f:
+            f.write(f"{os.path.basename(path)}/METADATA,,\n")
+    return names
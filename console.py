@@ -0,0 +1,60 @@
+# console.py
+import os, time, threading
+from collections import deque
+from PyQt6.QtWidgets import QPlainTextEdit
+from PyQt6.QtGui import QFont
+from PyQt6.QtCore import QTimer
+from pippilot.cache import default_cache_dir
+
+MAX_BLOCKS = 5000
+FLUSH_MS = 50
+
+class ConsoleView(QPlainTextEdit):
+    # write() may be called from any thread; lines are collected in a bounded buffer and
+    # appended to the view in one chunk per timer tick instead of one signal per line.
+    def __init__(self, max_blocks=MAX_BLOCKS, flush_ms=FLUSH_MS, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(max_blocks)
+        self.setFont(QFont("Consolas", 10))
+        self._pending = deque(maxlen=max_blocks)
+        self._lock = threading.Lock()
+        self.spill = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(flush_ms)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    def write(self, text):
+        with self._lock:
+            self._pending.append(text)
+            if self.spill:
+                self.spill.write(text + "\n")
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            lines = list(self._pending)
+            self._pending.clear()
+        self.appendPlainText("\n".join(lines))
+        bar = self.verticalScrollBar()
+        bar.setValue(bar.maximum())
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+        super().clear()
+
+    def start_spill(self):
+        path = os.path.join(default_cache_dir(), "logs", time.strftime("pippilot-%Y%m%d-%H%M%S.log"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            self.spill = open(path, "a", encoding="utf-8")
+        return path
+
+    def stop_spill(self):
+        with self._lock:
+            spill, self.spill = self.spill, None
+        if spill:
+            spill.close()
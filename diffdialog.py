@@ -0,0 +1,77 @@
+# diffdialog.py
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QCheckBox,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+)
+from PyQt6.QtGui import QColor
+from PyQt6.QtCore import QThread, pyqtSignal
+from pippilot.pipmanager import get_installed_packages
+from pippilot.lockfile import direction
+
+CHANGE_COLORS = {"install": "#98C379", "upgrade": "#98C379", "downgrade": "#E5C07B", "change": "#E5C07B", "remove": "#E06C75"}
+
+class ScanThread(QThread):
+    finished = pyqtSignal(str, dict)
+
+    def __init__(self, interpreter):
+        super().__init__()
+        self.interpreter = interpreter
+
+    def run(self):
+        try:
+            packages = get_installed_packages(self.interpreter)
+        except Exception:
+            packages = {}
+        self.finished.emit(self.interpreter, packages)
+
+class DiffDialog(QDialog):
+    # changes: lockfile.diff(this environment, other side); restore(changes) asks the window to apply them
+    restore = pyqtSignal(dict)
+
+    def __init__(self, other, changes, parent=None):
+        super().__init__(parent)
+        self.changes = changes
+        self.setWindowTitle(f"pipPilot – Compare with {other}")
+        self.resize(700, 500)
+        layout = QVBoxLayout(self)
+
+        rows = [(name, None, version, "install") for name, version in changes["install"].items()]
+        rows += [(name, old, new, direction(old, new)) for name, (old, new) in changes["change"].items()]
+        rows += [(name, version, None, "remove") for name, version in changes["remove"].items()]
+        rows.sort(key=lambda row: row[0].lower())
+        counts = {key: len(changes[key]) for key in ("install", "change", "remove")}
+        summary = QLabel(f"{counts['install']} missing here, {counts['change']} at another version, "
+                         f"{counts['remove']} only here." if rows else "Both sides have the same packages.")
+        layout.addWidget(summary)
+
+        table = QTableWidget(len(rows), 4)
+        table.setHorizontalHeaderLabels(["Package", "This environment", other, "Change"])
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.verticalHeader().hide()
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        for row, (name, here, there, change) in enumerate(rows):
+            for col, text in enumerate((name, here or "–", there or ("–" if change == "remove" else "any"), change)):
+                table.setItem(row, col, QTableWidgetItem(text))
+            table.item(row, 3).setForeground(QColor(CHANGE_COLORS[change]))
+        layout.addWidget(table)
+
+        buttons = QHBoxLayout()
+        self.prune = QCheckBox("Also uninstall packages only this environment has")
+        self.prune.setEnabled(bool(changes["remove"]))
+        buttons.addWidget(self.prune)
+        buttons.addStretch()
+        match = QPushButton("Match the other side")
+        match.setEnabled(bool(changes["install"] or changes["change"] or changes["remove"]))
+        match.clicked.connect(self._match)
+        buttons.addWidget(match)
+        close = QPushButton("Close")
+        close.clicked.connect(self.reject)
+        buttons.addWidget(close)
+        layout.addLayout(buttons)
+
+    def _match(self):
+        changes = dict(self.changes)
+        if not self.prune.isChecked():
+            changes["remove"] = {}
+        self.restore.emit(changes)
+        self.accept()
@@ -1,21 +1,30 @@
 # landing.py
+import atexit
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QComboBox, QPushButton,
     QHBoxLayout, QWidget, QSpacerItem, QSizePolicy
 )
-from PyQt6.QtCore import Qt
-import shutil
-import sys
-
-def find_interpreters():
-    seen = set()
-    paths = []
-    for exe in [sys.executable, "python", "python3", "py"]:
-        path = shutil.which(exe)
-        if path and path not in seen:
-            seen.add(path)
-            paths.append(path)
-    return paths
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from pippilot.discovery import cached_interpreters, discover_interpreters, describe
+
+# The dialog may close (and be dropped) while probes are still running. Its discovery thread is
+# kept here instead, and only waited for when the process exits.
+_threads = []
+atexit.register(lambda: [thread.wait() for thread in _threads])
+
+class DiscoveryThread(QThread):
+    finished = pyqtSignal(list)
+
+    def __init__(self):
+        super().__init__()
+        _threads.append(self)
+
+    def run(self):
+        try:
+            interpreters = discover_interpreters()
+        except RuntimeError:
+            return  # the process is exiting: its executors take no more work
+        self.finished.emit(interpreters)
 
 class LandingDialog(QDialog):
     def __init__(self):
@@ -109,27 +118,52 @@ class LandingDialog(QDialog):
         main_layout.addWidget(self.desc_label)
 
         self.combo = QComboBox()
-        self.interpreters = find_interpreters()
-        self.combo.addItems(self.interpreters)
         main_layout.addWidget(self.combo)
 
-        status = f"Detected {len(self.interpreters)} interpreter(s)."
-        self.detect_label = QLabel(status)
+        self.detect_label = QLabel()
         self.detect_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         main_layout.addWidget(self.detect_label)
 
-        python_status = "Detected Python: Yes" if self.interpreters else "Detected Python: No"
-        self.python_detect_label = QLabel(python_status)
+        self.python_detect_label = QLabel()
         self.python_detect_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         main_layout.addWidget(self.python_detect_label)
 
+        # Show what we knew last time right away, then refine with a background scan
+        self._set_interpreters(cached_interpreters(), searching=True)
+        self.discovery = DiscoveryThread()
+        self.discovery.finished.connect(self._set_interpreters)
+        self.discovery.start()
+
         self.btn_continue = QPushButton("Continue")
         self.btn_continue.setObjectName("PrimaryBtn")
         self.btn_continue.setCursor(Qt.CursorShape.PointingHandCursor)
         self.btn_continue.clicked.connect(self.accept)
         main_layout.addWidget(self.btn_continue)
 
+    def _set_interpreters(self, interpreters, searching=False):
+        current = self.combo.currentData()
+        self.interpreters = interpreters
+        self.combo.clear()
+        for info in interpreters:
+            self.combo.addItem(describe(info), info["path"])
+        index = self.combo.findData(current)
+        if index >= 0:
+            self.combo.setCurrentIndex(index)
+
+        status = f"Detected {len(interpreters)} interpreter(s)."
+        self.detect_label.setText(status + (" Searching for more..." if searching else ""))
+        python_status = "Detected Python: Yes" if interpreters else "Detected Python: No"
+        self.python_detect_label.setText(python_status)
+
+    def done(self, result):
+        # the choice is made: whatever discovery still finds has nowhere to go
+        try:
+            self.discovery.finished.disconnect(self._set_interpreters)
+        except TypeError:
+            pass  # closed twice
+        super().done(result)
+
     def exec_and_return(self):
         if self.exec() == QDialog.DialogCode.Accepted:
-            return self.combo.currentText()
+            return self.combo.currentData()
         return None
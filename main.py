@@ -1,86 +1,205 @@
 # main.py
-import sys, subprocess, requests
-from functools import partial
+import sys, time, asyncio
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QPushButton, QTextEdit, QProgressBar, QScrollArea, QLineEdit, QCheckBox,
-    QMessageBox
+    QPushButton, QProgressBar, QLineEdit, QCheckBox, QMessageBox,
+    QTableView, QHeaderView, QAbstractItemView, QListWidget, QListWidgetItem,
+    QDockWidget, QPlainTextEdit, QTreeWidget, QTreeWidgetItem, QMenu, QFileDialog
 )
-from PyQt6.QtGui import QFont, QColor, QPalette, QTextCursor
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from pipmanager import get_installed_packages
+from PyQt6.QtGui import QFont, QColor, QPalette
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
+from pippilot import Engine
+from pippilot.tracing import tracer, span
+from pippilot.pipmanager import diff_packages, normalize_name
+from pippilot.search import SearchIndex, index_entries
+from pippilot.metadata import format_info
+from pippilot.opqueue import OperationQueue, INSTALL, UNINSTALL, RUNNING, DONE, FAILED, CANCELLED
+from pippilot.tasks import CancelToken, Cancelled, Generations, run_cancellable
+from pippilot.snapshot import Snapshot
+from pippilot.lockfile import write_lock, read_lock, diff, restore_specs
+from pippilot.advisories import fixed_in
+from console import ConsoleView
+from diffdialog import DiffDialog, ScanThread
+from packagetable import (
+    PackageTableModel, PackageFilterProxy, ButtonDelegate, ACTION_COLUMNS,
+    COL_NAME, COL_INFO, COL_UNINSTALL, COL_STATUS, COL_UPDATE, advisories
+)
+
+TOOLING = ("pip", "setuptools", "wheel")
+INSTALL_TIMEOUT = 1800  # seconds a single pip call may run before it is stopped
+
+def _ago(seconds):
+    for unit, size in (("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= size:
+            n = int(seconds // size)
+            return f"{n} {unit}{'s' if n > 1 else ''} ago"
+    return "just now"
 
 class LoaderThread(QThread):
-    finished = pyqtSignal(list)
-    progress = pyqtSignal(int)
+    # both signals carry the generation the load was started for, so late ones can be ignored
+    finished = pyqtSignal(int, list)
+    progress = pyqtSignal(int, int)
+    scanned = pyqtSignal(int)  # the environment is read; the index lookups are still running
 
-    def __init__(self, interpreter):
+    def __init__(self, engine, packages=None, generation=0, token=None):
         super().__init__()
-        self.interpreter = interpreter
+        self.engine = engine
+        self.packages = packages
+        self.generation = generation
+        self.token = token
+        self.search_index = None
 
     def run(self):
-        pkgs = get_installed_packages(self.interpreter)
+        try:
+            with span("loader", delta=self.packages is not None, generation=self.generation):
+                result = asyncio.run(run_cancellable(self._load(), self.token))
+        except Cancelled:
+            return  # superseded: nothing to report
+        self.finished.emit(self.generation, result)
+
+    async def _load(self):
+        pkgs = self.packages
+        if pkgs is None:
+            pkgs = await self.engine.scan()
+            self.scanned.emit(self.generation)
         total = len(pkgs)
-        result = []
-        for i, (name, ver) in enumerate(pkgs.items(), 1):
-            if "-" in name or "." in name:
-                self.progress.emit(int(i / total * 100))
-                continue
-            try:
-                res = requests.get(f"https://pypi.org/pypi/{name}/json", timeout=5)
-                latest = res.json()["info"]["version"]
-            except:
-                latest = ver
-            result.append((name, ver, ver == latest, latest))
-            self.progress.emit(int(i / total * 100))
-        self.finished.emit(result)
+        done = [0]
+
+        def on_result(status):
+            done[0] += 1
+            self.progress.emit(self.generation, int(done[0] / total * 100))
+
+        result = await self.engine.check_outdated(pkgs, on_result, self.token)
+        if self.packages is None:
+            # build the search index here so a large environment doesn't stall the UI thread
+            with span("search_index"):
+                self.search_index = SearchIndex(index_entries(list(pkgs), self.engine.dists))
+        return result
 
 class InstallThread(QThread):
-    log_line = pyqtSignal(str)
+    op_status = pyqtSignal(str, str)
+    changes = pyqtSignal(dict)
     finished = pyqtSignal(bool)
 
-    def __init__(self, interpreter, package, uninstall=False):
+    def __init__(self, engine, action, ops, log, token=None, restore=False):
         super().__init__()
-        self.interpreter = interpreter
-        self.package = package
-        self.uninstall = uninstall
+        self.engine = engine
+        self.log = log  # thread-safe, see ConsoleView.write
+        self.action = action
+        self.ops = ops  # [(operation id, package spec)]
+        self.restore = restore  # matching a lock file: pins go in a requirements file, failures aren't retried
+        self.uninstall = action == UNINSTALL
+        self.token = token or CancelToken()
 
     def run(self):
+        with span("install", action=self.action, packages=len(self.ops)):
+            result = asyncio.run(self._run())
+        self.finished.emit(result)
+
+    async def _run(self):
+        before = await self.engine.scan()
+        success = await self._run_batch(self.ops)
+        self.changes.emit(diff_packages(before, await self.engine.scan()))
+        return success
+
+    async def _run_batch(self, ops):
+        if not self.token.cancelled:
+            for op_id, _ in ops:
+                self.op_status.emit(op_id, RUNNING)
+            ok = await self._run_pip([pkg for _, pkg in ops])
+        if self.token.cancelled:
+            for op_id, _ in ops:
+                self.op_status.emit(op_id, CANCELLED)
+            return False
+        if ok or len(ops) == 1 or self.restore:
+            for op_id, _ in ops:
+                self.op_status.emit(op_id, DONE if ok else FAILED)
+            return ok
+        # isolate the failure: one bad package shouldn't fail the rest of the batch
+        self.log("⚠️ Batched call failed, retrying packages one by one...\n")
+        results = [await self._run_batch([op]) for op in ops]
+        return all(results)
+
+    async def _run_pip(self, packages):
+        self.package = f"{len(packages)} packages" if self.restore and len(packages) > 1 else ", ".join(packages)
         if self.uninstall:
-            cmd = [self.interpreter, "-m", "pip", "uninstall", "-y", self.package]
-            self.log_line.emit(f"🗑️ Uninstalling '{self.package}'...\n")
+            self.log(f"🗑️ Uninstalling '{self.package}'...\n")
         else:
-            cmd = [self.interpreter, "-m", "pip", "install", "--upgrade", self.package, "--disable-pip-version-check", "--no-cache-dir"]
-            self.log_line.emit(f"🔄 Starting installation/update of '{self.package}'...\n")
+            self.log(f"🔄 Starting installation/update of '{self.package}'...\n")
 
         try:
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-            for line in iter(process.stdout.readline, ''):
-                if not line:
-                    break
-                self.log_line.emit(line.rstrip())
-            process.stdout.close()
-            retcode = process.wait()
+            retcode = await self.engine.execute(self.action, packages, self.log, token=self.token,
+                                                timeout=INSTALL_TIMEOUT, as_file=self.restore)
+            if self.token.cancelled:
+                self.log(f"⛔ Cancelled '{self.package}'.\n")
+                return False
             if retcode == 0:
                 action = "uninstalled" if self.uninstall else "installed/updated"
-                self.log_line.emit(f"✅ '{self.package}' successfully {action}.\n")
-                self.finished.emit(True)
-            else:
-                self.log_line.emit(f"❌ {('Uninstall' if self.uninstall else 'Install/update')} failed with exit code {retcode}.\n")
-                self.finished.emit(False)
+                self.log(f"✅ '{self.package}' successfully {action}.\n")
+                return True
+            self.log(f"❌ {('Uninstall' if self.uninstall else 'Install/update')} failed with exit code {retcode}.\n")
+        except Exception as e:
+            self.log(f"❌ Exception during {'uninstall' if self.uninstall else 'install/update'}: {e}\n")
+        return False
+
+class AdvisoryImportThread(QThread):
+    finished = pyqtSignal(int, str)  # advisories imported, error message
+
+    def __init__(self, database, source):
+        super().__init__()
+        self.database = database
+        self.source = source
+
+    def run(self):
+        try:
+            with span("advisories_import"):
+                count = self.database.import_from(self.source)
         except Exception as e:
-            self.log_line.emit(f"❌ Exception during {'uninstall' if self.uninstall else 'install/update'}: {e}\n")
-            self.finished.emit(False)
+            self.finished.emit(0, str(e) or type(e).__name__)
+            return
+        self.finished.emit(count, "")
+
+class DependencyThread(QThread):
+    # reads every package once and brings the dependency index up to date with the latest scan
+    def __init__(self, metadata):
+        super().__init__()
+        self.metadata = metadata
+
+    def run(self):
+        with span("dependencies"):
+            self.metadata.dependencies()
 
 class GlobalPipPilot(QMainWindow):
     def __init__(self, interpreter):
         super().__init__()
         self.interpreter = interpreter
+        self.engine = Engine(interpreter)
+        self.lookup = self.engine.lookup
+        self.loads = Generations()
+        self.loader = None
+        self.loader_threads = []
+        self.refresh_span = None
+        self.tooling = {}
+        self.tooling_outdated = []
+        self.install_thread = None
+        self.scan_thread = None
+        self.import_thread = None
+        self.deps_thread = None
+        self.deps_ready = False  # set once the index covers a finished scan, not just the snapshot
+        self.deps_stale = False
+        self.pending_info = None
+        self.queue = OperationQueue(interpreter)
+        self.snapshot = Snapshot(interpreter)
+        self.search_index = SearchIndex()
+        self.metadata = self.engine.metadata
         self.setWindowTitle("pipPilot – Package Overview")
         self.resize(1000, 700)
         self._setup_palette()
         self._init_ui()
+        self._refresh_queue()
+        self._show_snapshot()
         self._load_packages()
+        self._run_queue()
 
     def _setup_palette(self):
         p = QPalette()
@@ -95,28 +214,86 @@ class GlobalPipPilot(QMainWindow):
         layout = QVBoxLayout(central)
 
         # Top bar (search + refresh + sort toggle)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(120)
+        self.search_timer.timeout.connect(self._filter)
         top = QHBoxLayout()
         self.search = QLineEdit()
         self.search.setPlaceholderText("🔍 Search packages...")
-        self.search.textChanged.connect(self._filter)
+        self.search.textChanged.connect(self.search_timer.start)
         top.addWidget(self.search)
 
-        self.sort_toggle = QCheckBox("🔃 Show outdated first")
-        self.sort_toggle.stateChanged.connect(self._refresh_package_list)
+        self.sort_toggle = QCheckBox("🔃 Show vulnerable & outdated first")
+        self.sort_toggle.stateChanged.connect(self._apply_sort)
         top.addWidget(self.sort_toggle)
 
         self.btn_refresh = QPushButton("🔁 Refresh")
         self.btn_refresh.clicked.connect(self._load_packages)
         top.addWidget(self.btn_refresh)
+
+        self.btn_export = QPushButton("📤 Export lock")
+        self.btn_export.clicked.connect(self._export_lock)
+        top.addWidget(self.btn_export)
+        self.btn_compare = QPushButton("🔍 Compare")
+        compare_menu = QMenu(self)
+        compare_menu.addAction("With another interpreter...", self._compare_interpreter)
+        compare_menu.addAction("With a lock file...", self._compare_lock)
+        self.btn_compare.setMenu(compare_menu)
+        top.addWidget(self.btn_compare)
+        self.btn_advisories = QPushButton("🛡 Advisories")
+        advisories_menu = QMenu(self)
+        advisories_menu.addAction("Import OSV file or zip...", self._import_advisory_file)
+        advisories_menu.addAction("Import OSV directory...", self._import_advisory_dir)
+        self.btn_advisories.setMenu(advisories_menu)
+        top.addWidget(self.btn_advisories)
         layout.addLayout(top)
 
-        # Scroll Area
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_widget = QWidget()
-        self.scroll_layout = QVBoxLayout(self.scroll_widget)
-        self.scroll_area.setWidget(self.scroll_widget)
-        layout.addWidget(self.scroll_area)
+        # Package table
+        self.model = PackageTableModel(self)
+        self.proxy = PackageFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setFont(QFont("Segoe UI", 10))
+        self.table.setShowGrid(False)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.table.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.table.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().hide()
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(30)
+        header = self.table.horizontalHeader()
+        for col, width in ((COL_INFO, 70), (COL_UNINSTALL, 90), (COL_UPDATE, 90)):
+            header.setSectionResizeMode(col, QHeaderView.ResizeMode.Fixed)
+            header.resizeSection(col, width)
+        header.setSectionResizeMode(COL_NAME, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(COL_STATUS, QHeaderView.ResizeMode.Stretch)
+        self.delegate = ButtonDelegate(self.table)
+        self.delegate.clicked.connect(self._on_action)
+        for col in ACTION_COLUMNS:
+            self.table.setItemDelegateForColumn(col, self.delegate)
+        layout.addWidget(self.table)
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(100)
+        self.prefetch_timer.timeout.connect(self._prefetch_visible)
+        self.table.verticalScrollBar().valueChanged.connect(self.prefetch_timer.start)
+
+        # pip / setuptools / wheel status
+        tooling_bar = QHBoxLayout()
+        tooling_bar.setContentsMargins(4, 2, 4, 2)
+        tooling_label = QLabel("Tooling:")
+        tooling_label.setFont(QFont("Segoe UI", 10))
+        tooling_bar.addWidget(tooling_label)
+        self.tooling_status = QLabel("")
+        tooling_bar.addWidget(self.tooling_status, 4)
+        self.tooling_btn = QPushButton("Update tooling")
+        self.tooling_btn.setEnabled(False)
+        self.tooling_btn.clicked.connect(self._update_tooling)
+        tooling_bar.addWidget(self.tooling_btn, 1)
+        layout.addLayout(tooling_bar)
 
         # Install Package
         install_layout = QHBoxLayout()
@@ -129,12 +306,43 @@ class GlobalPipPilot(QMainWindow):
         install_layout.addWidget(self.install_btn)
         layout.addLayout(install_layout)
 
+        # Operation queue
+        queue_layout = QHBoxLayout()
+        self.queue_list = QListWidget()
+        self.queue_list.setFixedHeight(120)
+        # a batch reports each of its operations twice; save and redraw once per burst
+        self.queue_timer = QTimer(self)
+        self.queue_timer.setSingleShot(True)
+        self.queue_timer.setInterval(100)
+        self.queue_timer.timeout.connect(self._queue_changed)
+        queue_layout.addWidget(self.queue_list)
+        queue_buttons = QVBoxLayout()
+        for label, slot in (("▲", lambda: self._move_op(-1)), ("▼", lambda: self._move_op(1)),
+                            ("Remove", self._remove_op), ("Cancel", self._cancel_running),
+                            ("Clear done", self._clear_finished_ops)):
+            btn = QPushButton(label)
+            btn.setFixedWidth(90)
+            btn.clicked.connect(slot)
+            queue_buttons.addWidget(btn)
+        queue_layout.addLayout(queue_buttons)
+        layout.addLayout(queue_layout)
+
         # Output label + clear
         output_layout = QHBoxLayout()
         self.output_label = QLabel("Output:")
         self.output_label.setFont(QFont("Segoe UI", 10, weight=QFont.Weight.Bold))
         output_layout.addWidget(self.output_label)
         output_layout.addStretch()
+        self.spill_toggle = QCheckBox("Save full log")
+        self.spill_toggle.toggled.connect(self._toggle_spill)
+        output_layout.addWidget(self.spill_toggle)
+        self.trace_toggle = QCheckBox("Trace")
+        self.trace_toggle.setChecked(tracer.enabled)
+        self.trace_toggle.toggled.connect(self._toggle_trace)
+        output_layout.addWidget(self.trace_toggle)
+        self.export_trace_btn = QPushButton("Export trace")
+        self.export_trace_btn.clicked.connect(self._export_trace)
+        output_layout.addWidget(self.export_trace_btn)
         self.clear_btn = QPushButton("Clear")
         self.clear_btn.setFixedWidth(70)
         self.clear_btn.clicked.connect(self._clear_console)
@@ -142,10 +350,8 @@ class GlobalPipPilot(QMainWindow):
         layout.addLayout(output_layout)
 
         # Console
-        self.console = QTextEdit()
-        self.console.setReadOnly(True)
+        self.console = ConsoleView()
         self.console.setFixedHeight(140)
-        self.console.setFont(QFont("Consolas", 10))
         layout.addWidget(self.console)
 
         # Progress
@@ -153,178 +359,346 @@ class GlobalPipPilot(QMainWindow):
         self.statusBar().addPermanentWidget(self.progress)
         self.progress.hide()
 
+        # Package info panel (non-modal, filled from installed metadata) with the dependency tree below
+        info_panel = QWidget()
+        info_layout = QVBoxLayout(info_panel)
+        info_layout.setContentsMargins(0, 0, 0, 0)
+        self.info_view = QPlainTextEdit()
+        self.info_view.setReadOnly(True)
+        self.info_view.setFont(QFont("Consolas", 10))
+        info_layout.addWidget(self.info_view)
+        self.dep_tree = QTreeWidget()
+        self.dep_tree.setHeaderLabels(["Dependencies"])
+        self.dep_tree.itemExpanded.connect(self._expand_dep_item)
+        info_layout.addWidget(self.dep_tree)
+        self.info_dock = QDockWidget("Package Info", self)
+        self.info_dock.setWidget(info_panel)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.info_dock)
+        self.info_dock.hide()
+
     def _clear_console(self):
         self.console.clear()
 
     def _log(self, text):
-        self.console.append(text)
-        self.console.moveCursor(QTextCursor.MoveOperation.End)
+        self.console.write(text)
+
+    def _toggle_spill(self, checked):
+        if checked:
+            self._log(f"📝 Writing full log to {self.console.start_spill()}\n")
+        else:
+            self.console.stop_spill()
+
+    def _toggle_trace(self, checked):
+        tracer.enabled = checked
+        if not checked:
+            self.statusBar().clearMessage()
+
+    def _export_trace(self):
+        try:
+            self._log(f"🧭 Trace written to {tracer.export()} (open it in chrome://tracing or ui.perfetto.dev)\n")
+        except OSError as e:
+            self._log(f"❌ Could not write trace: {e}\n")
+
+    def _show_summary(self, since):
+        message = self.lookup.summary()
+        if tracer.enabled:
+            message += f" · {tracer.summary(since)}"
+        self.statusBar().showMessage(message)
+
+    def _show_snapshot(self):
+        # the table from the last session, up until the refresh started right after it revalidates it
+        statuses = self.snapshot.statuses
+        if not statuses:
+            return
+        with span("snapshot", rows=len(statuses)):
+            self.model.set_packages(statuses)
+            # summaries and keywords come with the scan; until then only names are searchable
+            self.search_index = SearchIndex(index_entries([s.name for s in statuses], {}))
+            self._filter()
+            self._set_tooling(statuses)
+        self.statusBar().showMessage(f"Showing the package list from {_ago(self.snapshot.age())}, checking for updates...")
+
+    def _start_loader(self, packages=None):
+        # loaders of older generations are cancelled, not waited for; keep them referenced until they exit
+        self.loader_threads = [t for t in self.loader_threads if not t.isFinished()]
+        thread = LoaderThread(self.engine, packages, self.loads.current, self.loads.token)
+        self.loader_threads.append(thread)
+        return thread
 
     def _load_packages(self):
-        self.btn_refresh.setEnabled(False)
+        # a refresh supersedes the one in progress (and any delta loads): their requests are
+        # aborted and whatever they still report is ignored
+        if self.refresh_span:
+            self.refresh_span.set(superseded=True)
+            self.refresh_span.end()
+        self.loads.start()
+        self.refresh_started = time.perf_counter()
+        self.refresh_span = span("refresh", generation=self.loads.current)
         self.progress.show()
         self.progress.setValue(0)
-        self.scroll_clear()
-        self.thread = LoaderThread(self.interpreter)
-        self.thread.progress.connect(self.progress.setValue)
-        self.thread.finished.connect(self._on_loaded)
-        self.thread.start()
-
-    def _on_loaded(self, packages):
+        # the rows on screen stay usable while they are revalidated
+        self.lookup.reset_stats()
+        self.loader = self._start_loader()
+        self.loader.progress.connect(self._on_progress)
+        self.loader.scanned.connect(self._on_scanned)
+        self.loader.finished.connect(self._on_loaded)
+        self.loader.start()
+
+    def _on_progress(self, generation, value):
+        if self.loads.is_current(generation):
+            self.progress.setValue(value)
+
+    def _on_scanned(self, generation):
+        # the dependency index needs only the local metadata, not the lookups
+        if self.loads.is_current(generation):
+            self._sync_dependencies()
+
+    def _on_loaded(self, generation, packages):
+        if not self.loads.is_current(generation):
+            return
         self.progress.hide()
-        self.btn_refresh.setEnabled(True)
-        self.packages = packages
-        self._refresh_package_list()
-
-    def scroll_clear(self):
-        for i in reversed(range(self.scroll_layout.count())):
-            widget = self.scroll_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-
-    def _refresh_package_list(self):
-        pkgs = self.packages
-        if self.sort_toggle.isChecked():
-            pkgs = sorted(pkgs, key=lambda x: x[2])  # outdated first
-        else:
-            pkgs = sorted(pkgs)
-
-        self.scroll_clear()
-        self.package_rows = {}
-
-        for name, ver, uptodate, latest in pkgs:
-            row = QWidget()
-            h = QHBoxLayout(row)
-            h.setContentsMargins(4, 2, 4, 2)
-
-            # Name
-            name_lbl = QLabel(name)
-            name_lbl.setFont(QFont("Segoe UI", 10))
-            h.addWidget(name_lbl, 2)
-
-            # Info Button
-            info_btn = QPushButton("Info")
-            info_btn.setFixedWidth(60)
-            info_btn.setStyleSheet(
-                "QPushButton { background-color: #555; color: white; }"
-                "QPushButton:hover { background-color: #777; }"
-            )
-            info_btn.setCursor(Qt.CursorShape.PointingHandCursor)
-            info_btn.clicked.connect(partial(self._show_package_info, name))
-            h.addWidget(info_btn, 1)
-
-            # Uninstall Button
-            uninstall_btn = QPushButton("Uninstall")
-            uninstall_btn.setFixedWidth(80)
-            uninstall_btn.setStyleSheet(
-                "QPushButton { background-color: #b34040; color: white; }"
-                "QPushButton:hover { background-color: #d04e4e; }"
-            )
-            uninstall_btn.setCursor(Qt.CursorShape.PointingHandCursor)
-            uninstall_btn.clicked.connect(partial(self._confirm_uninstall, name))
-            h.addWidget(uninstall_btn, 1)
-
-            # Status
-            stat = QLabel("Up-to-date" if uptodate else f"{ver} → {latest}")
-            stat.setStyleSheet(f"color:{'#98C379' if uptodate else '#E5C07B'}")
-            h.addWidget(stat, 2)
-
-            # Update Button
-            update_btn = QPushButton("Update")
-            update_btn.setEnabled(not uptodate)
-            if uptodate:
-                update_btn.setStyleSheet("QPushButton { background-color: #444; color: white; }")
-            else:
-                update_btn.setStyleSheet(
-                    "QPushButton { background-color: #98C379; color: white; }"
-                    "QPushButton:hover { background-color: #85a363; }"
-                )
-                update_btn.setCursor(Qt.CursorShape.PointingHandCursor)
-            update_btn.clicked.connect(partial(self._update_package, name))
-            h.addWidget(update_btn, 1)
-
-            self.scroll_layout.addWidget(row)
-            self.package_rows[name.lower()] = row
-
-        self._add_pip_block()
+        with span("table", rows=len(packages)) as s:
+            s.set(changed=self.model.merge(packages))
+        self.snapshot.save(packages)
+        self.search_index = self.loader.search_index
+        with span("filter"):
+            self._filter()
+        with span("tooling"):
+            self.tooling = {}
+            self._set_tooling(packages)
+        self._prefetch_visible()
+        flagged = sorted((p[0] for p in packages if advisories(p)), key=str.lower)
+        if flagged:
+            self._log(f"⚠️ Known advisories affect the installed version of {len(flagged)} package(s): {', '.join(flagged)}\n")
+        if self.engine.prefetch(packages, self._on_wheels_ready):
+            self._log(f"📦 Downloading wheels for {sum(1 for p in packages if not p.uptodate)} pending update(s) in the background...\n")
+        self.refresh_span.end()
+        self.refresh_span = None
+        self._show_summary(self.refresh_started)
+
+    def _on_wheels_ready(self, fetched):
+        # called from the wheelhouse's worker thread; ConsoleView.write is thread-safe
+        if fetched:
+            self._log(f"📦 {len(fetched)} wheel(s) ready locally: {', '.join(sorted(fetched, key=str.lower))}\n")
+
+    def _apply_sort(self):
+        self.proxy.set_outdated_first(self.sort_toggle.isChecked())
+
+    def _on_action(self, column, name):
+        if column == COL_INFO:
+            self._show_package_info(name)
+        elif column == COL_UNINSTALL:
+            self._confirm_uninstall(name)
+        elif column == COL_UPDATE:
+            self._update_package(name)
+
+    def _apply_changes(self, changes):
+        self._sync_dependencies()
+        for name in changes["removed"]:
+            self.model.remove(name)
+            self.search_index.remove(name)
+            if self.tooling.pop(normalize_name(name), None):
+                self._render_tooling()
+        updated = {**changes["added"], **changes["changed"]}
+        if self.refresh_span:
+            # the refresh in progress may have scanned before this operation and would bring the
+            # old state back; a new one supersedes it and covers the changes
+            self._log("🔄 Restarting the refresh to include the changes...\n")
+            self._load_packages()
+            return
+        if not updated:
+            self.snapshot.save(self.model.packages, [])
+            return
+        self._log(f"🔄 Updating changed packages: {', '.join(sorted(updated))}\n")
+        thread = self._start_loader(updated)
+        thread.finished.connect(self._on_delta_loaded)
+        thread.start()
+
+    def _on_delta_loaded(self, generation, packages):
+        if not self.loads.is_current(generation):
+            return  # a full refresh started since; it covers these packages
+        with span("table", rows=len(packages), delta=True):
+            for pkg in packages:
+                self.model.upsert(pkg)
+        self.snapshot.save(self.model.packages, packages)
+        with span("search_index", delta=True):
+            for entry in index_entries([pkg[0] for pkg in packages], self.engine.dists):
+                self.search_index.add(*entry)
+        with span("filter"):
+            self._filter()
+        self._set_tooling(packages)
+
+    def _sync_dependencies(self):
+        # one sync at a time; a scan that lands meanwhile is picked up by another right after
+        if self.deps_thread and self.deps_thread.isRunning():
+            self.deps_stale = True
+            return
+        self.deps_stale = False
+        self.deps_thread = DependencyThread(self.metadata)
+        self.deps_thread.finished.connect(self._on_dependencies)
+        self.deps_thread.start()
+
+    def _on_dependencies(self):
+        self.deps_ready = True
+        if self.deps_stale:
+            self._sync_dependencies()
+        if self.pending_info:
+            name, self.pending_info = self.pending_info, None
+            self._show_package_info(name)
 
     def _confirm_uninstall(self, name):
-        reply = QMessageBox.question(
-            self, "Confirm Uninstall",
+        if not self.deps_ready:
+            self._log("⏳ Still reading dependencies, try again in a moment.\n")
+            return
+        deps = self.metadata.deps
+        dependents = deps.required_by(name)
+        orphans = [n for n in deps.orphans([name]) if normalize_name(n) not in TOOLING]
+        box = QMessageBox(
+            QMessageBox.Icon.Question, "Confirm Uninstall",
             f"Are you sure you want to uninstall '{name}'?",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, self
         )
-        if reply == QMessageBox.StandardButton.Yes:
+        details = []
+        if dependents:
+            details.append(f"Required by {', '.join(dependents)}, which may stop working.")
+        also = None
+        if orphans:
+            details.append(f"Nothing else needs {', '.join(orphans)}.")
+            also = QCheckBox(f"Also uninstall the {len(orphans)} package(s) nothing else needs")
+            box.setCheckBox(also)
+        box.setInformativeText("\n\n".join(details))
+        if box.exec() == QMessageBox.StandardButton.Yes:
             self._uninstall_package(name)
+            if also and also.isChecked():
+                for orphan in orphans:
+                    self._uninstall_package(orphan)
 
     def _uninstall_package(self, name):
-        if hasattr(self, "install_thread") and self.install_thread.isRunning():
-            self._log("⚠️ Another operation is running, please wait...\n")
-            return
-        self._log(f"🗑️ Uninstalling: {name}\n")
-        self.install_thread = InstallThread(self.interpreter, name, uninstall=True)
-        self.install_thread.log_line.connect(self._log)
-        self.install_thread.finished.connect(self._on_update_finished)
-        self.btn_refresh.setEnabled(False)
-        self.install_thread.start()
-
-    def _add_pip_block(self):
-        try:
-            out = subprocess.run(
-                [self.interpreter, "-m", "pip", "--version"],
-                capture_output=True, text=True
-            ).stdout.strip()
-            current = out.split()[-1]
-            latest = requests.get("https://pypi.org/pypi/pip/json", timeout=5).json()["info"]["version"]
-            uptodate = current == latest
-        except:
-            current, latest, uptodate = "?", "?", True
-
-        row = QWidget()
-        h = QHBoxLayout(row)
-        h.setContentsMargins(4, 2, 4, 2)
-
-        pip_lbl = QLabel(f"pip ({current})")
-        pip_lbl.setFont(QFont("Segoe UI", 10))
-        h.addWidget(pip_lbl, 3)
-
-        pip_status = QLabel("Up-to-date" if uptodate else f"Update → {latest}")
-        pip_status.setStyleSheet(f"color:{'#98C379' if uptodate else '#E5C07B'}")
-        h.addWidget(pip_status, 2)
-
-        pip_btn = QPushButton("Update pip")
-        pip_btn.setEnabled(not uptodate)
-        if uptodate:
-            pip_btn.setStyleSheet("QPushButton { background-color: #444; color: white; }")
+        self._enqueue(UNINSTALL, name)
+
+    def _set_tooling(self, packages):
+        for pkg in packages:
+            key = normalize_name(pkg[0])
+            if key in TOOLING:
+                self.tooling[key] = pkg
+        self._render_tooling()
+
+    def _render_tooling(self):
+        # Built from the loader's results: no subprocess or network call on the UI thread
+        parts, outdated = [], []
+        for key in TOOLING:
+            pkg = self.tooling.get(key)
+            if pkg is None:
+                continue
+            name, ver, uptodate, latest = pkg[:4]
+            text = f"{name} {ver}" if uptodate else f"{name} {ver} → {latest}"
+            parts.append(f"<span style='color:{'#98C379' if uptodate else '#E5C07B'}'>{text}</span>")
+            if not uptodate:
+                outdated.append(name)
+        self.tooling_status.setText(" · ".join(parts) or "?")
+        self.tooling_outdated = outdated
+        self.tooling_btn.setEnabled(bool(outdated))
+        if not outdated:
+            self.tooling_btn.setStyleSheet("QPushButton { background-color: #444; color: white; }")
+            self.tooling_btn.setCursor(Qt.CursorShape.ArrowCursor)
         else:
-            pip_btn.setStyleSheet(
+            self.tooling_btn.setStyleSheet(
                 "QPushButton { background-color: #98C379; color: white; }"
                 "QPushButton:hover { background-color: #85a363; }"
             )
-            pip_btn.setCursor(Qt.CursorShape.PointingHandCursor)
-        pip_btn.clicked.connect(lambda: self._update_package("pip"))
-        h.addWidget(pip_btn, 1)
+            self.tooling_btn.setCursor(Qt.CursorShape.PointingHandCursor)
 
-        self.scroll_layout.addWidget(row)
+    def _update_tooling(self):
+        for name in self.tooling_outdated:
+            self._update_package(name)
 
     def _update_package(self, name):
-        if hasattr(self, "install_thread") and self.install_thread.isRunning():
-            self._log("⚠️ An update/install is already running, please wait...\n")
+        self._enqueue(INSTALL, name)
+
+    def _enqueue(self, action, name):
+        op = self.queue.enqueue(action, name)
+        self.queue.save()
+        if self.install_thread and self.install_thread.isRunning():
+            self._log(f"⏳ Queued {op.label()[2:]}\n")
+        self._refresh_queue()
+        self._run_queue()
+
+    def _run_queue(self):
+        if self.install_thread and self.install_thread.isRunning():
             return
-        self._log(f"🚀 Starting update/install for: {name}\n")
-        self.install_thread = InstallThread(self.interpreter, name)
-        self.install_thread.log_line.connect(self._log)
+        batch = self.queue.next_batch()
+        if not batch:
+            self.btn_refresh.setEnabled(True)
+            return
+        action, restore = batch[0].action, batch[0].restore
+        names = f"{len(batch)} packages to match" if restore else ", ".join(op.package for op in batch)
+        if action == UNINSTALL:
+            self._log(f"🗑️ Uninstalling: {names}\n")
+        else:
+            self._log(f"🚀 Starting update/install for: {names}\n")
+        self.install_thread = InstallThread(
+            self.engine, action, [(op.id, op.package) for op in batch], self.console.write, restore=restore
+        )
+        self.install_thread.op_status.connect(self._on_op_status)
+        self.install_thread.changes.connect(self._apply_changes)
         self.install_thread.finished.connect(self._on_update_finished)
         self.btn_refresh.setEnabled(False)
+        self.install_started = time.perf_counter()
         self.install_thread.start()
 
+    def _cancel_running(self):
+        if self.install_thread and self.install_thread.isRunning() and not self.install_thread.token.cancelled:
+            self._log("⛔ Cancelling the running operation...\n")
+            self.install_thread.token.cancel()
+
+    def _on_op_status(self, op_id, status):
+        self.queue.set_status(op_id, status)
+        if not self.queue_timer.isActive():
+            self.queue_timer.start()
+
+    def _queue_changed(self):
+        self.queue.save()
+        self._refresh_queue()
+
     def _on_update_finished(self, success):
-        if success:
-            self._log("🔄 Refreshing package list...\n")
-            self._load_packages()
-        else:
+        if not success and not self.install_thread.token.cancelled:
             self._log("❌ Operation failed. See logs above.\n")
-            self.btn_refresh.setEnabled(True)
+        if tracer.enabled:
+            self._show_summary(self.install_started)
+        self._run_queue()
+
+    def _refresh_queue(self):
+        selected = self._selected_op()
+        self.queue_list.clear()
+        for op in self.queue.items:
+            item = QListWidgetItem(op.label())
+            item.setData(Qt.ItemDataRole.UserRole, op.id)
+            self.queue_list.addItem(item)
+            if op.id == selected:
+                self.queue_list.setCurrentItem(item)
+
+    def _selected_op(self):
+        item = self.queue_list.currentItem()
+        return item.data(Qt.ItemDataRole.UserRole) if item else None
+
+    def _move_op(self, delta):
+        op_id = self._selected_op()
+        if op_id:
+            self.queue.move(op_id, delta)
+            self.queue.save()
+            self._refresh_queue()
+
+    def _remove_op(self):
+        op_id = self._selected_op()
+        if op_id:
+            self.queue.remove(op_id)
+            self.queue.save()
+            self._refresh_queue()
+
+    def _clear_finished_ops(self):
+        self.queue.clear_finished()
+        self.queue.save()
+        self._refresh_queue()
 
     def _install_package(self):
         pkg_name = self.install_input.text().strip()
@@ -334,16 +708,163 @@ class GlobalPipPilot(QMainWindow):
         self.install_input.clear()
         self._update_package(pkg_name)
 
-    def _filter(self, text):
-        text = text.strip().lower()
-        for name, row in self.package_rows.items():
-            row.setVisible(text in name)
+    def _import_advisory_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import OSV advisories", "", "OSV dumps (*.zip *.json);;All files (*)")
+        if path:
+            self._import_advisories(path)
 
-    def _show_package_info(self, name):
+    def _import_advisory_dir(self):
+        path = QFileDialog.getExistingDirectory(self, "Import OSV advisories")
+        if path:
+            self._import_advisories(path)
+
+    def _import_advisories(self, source):
+        if self.import_thread and self.import_thread.isRunning():
+            return
+        self._log(f"🛡 Importing advisories from {source}...\n")
+        self.import_thread = AdvisoryImportThread(self.engine.advisories, source)
+        self.import_thread.finished.connect(self._on_advisories_imported)
+        self.import_thread.start()
+
+    def _on_advisories_imported(self, count, error):
+        if error:
+            self._log(f"❌ Could not import advisories: {error}\n")
+            return
+        self._log(f"🛡 {count} advisories imported. Checking installed versions against them...\n")
+        self._load_packages()
+
+    def _installed(self):
+        # from the last scan; empty while the table still shows the snapshot
+        return {dist["name"]: dist["version"] for dist in self.engine.dists.values()}
+
+    def _export_lock(self):
+        packages = self._installed()
+        if not packages:
+            self._log("⚠️ Still scanning, try again in a moment.\n")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export lock file", "requirements.lock.txt",
+                                              "Lock files (*.txt *.lock);;All files (*)")
+        if not path:
+            return
         try:
-            output = subprocess.check_output(
-                [self.interpreter, "-m", "pip", "show", name], text=True
-            )
-            QMessageBox.information(self, f"Package Info – {name}", output)
-        except subprocess.CalledProcessError:
-            QMessageBox.warning(self, "Info", f"No information found for {name}.")
\ No newline at end of file
+            write_lock(packages, path, self.interpreter)
+            self._log(f"📤 {len(packages)} packages written to {path}\n")
+        except OSError as e:
+            self._log(f"❌ Could not write {path}: {e}\n")
+
+    def _compare_interpreter(self):
+        from landing import LandingDialog
+        other = LandingDialog().exec_and_return()
+        if not other:
+            return
+        self._log(f"🔍 Scanning {other}...\n")
+        self.scan_thread = ScanThread(other)
+        self.scan_thread.finished.connect(self._on_compare_scanned)
+        self.scan_thread.start()
+
+    def _on_compare_scanned(self, interpreter, packages):
+        if not packages:
+            self._log(f"❌ No packages found for {interpreter}.\n")
+            return
+        self._show_diff(interpreter, packages)
+
+    def _compare_lock(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Compare with lock file", "", "Lock files (*.txt *.lock);;All files (*)")
+        if not path:
+            return
+        try:
+            packages = read_lock(path)
+        except (OSError, UnicodeDecodeError) as e:
+            self._log(f"❌ Could not read {path}: {e}\n")
+            return
+        self._show_diff(path, packages)
+
+    def _show_diff(self, other, packages):
+        installed = self._installed()
+        if not installed:
+            self._log("⚠️ Still scanning, try again in a moment.\n")
+            return
+        dialog = DiffDialog(other, diff(installed, packages), self)
+        dialog.restore.connect(self._restore)
+        dialog.exec()
+
+    def _restore(self, changes):
+        # queued together, so the installs run as one batched pip call (and the removals as another)
+        specs = restore_specs(changes)
+        self.queue.enqueue_many(INSTALL, specs, restore=True)
+        self.queue.enqueue_many(UNINSTALL, sorted(changes["remove"], key=str.lower), restore=True)
+        self.queue.save()
+        self._log(f"🔁 Queued {len(specs)} install(s) and {len(changes['remove'])} uninstall(s) to match.\n")
+        self._refresh_queue()
+        self._run_queue()
+
+    def _filter(self):
+        self.proxy.set_matches(self.search_index.search(self.search.text()))
+        self.prefetch_timer.start()
+
+    def _prefetch_visible(self):
+        first = self.table.rowAt(0)
+        if first < 0:
+            return
+        last = self.table.rowAt(self.table.viewport().height() - 1)
+        if last < 0:
+            last = self.proxy.rowCount() - 1
+        self.metadata.prefetch([self.proxy.index(row, COL_NAME).data() for row in range(first, last + 1)])
+
+    def _show_package_info(self, name):
+        if not self.deps_ready:
+            # shown as soon as the first scan's dependencies are read
+            self.pending_info = name
+            self.info_dock.setWindowTitle(f"Package Info – {name}")
+            self.info_view.setPlainText("⏳ Loading dependencies...")
+            self.dep_tree.clear()
+            self.info_dock.show()
+            return
+        info = self.metadata.get(name, sync=False)
+        pkg = self.model.package(name)
+        self.info_dock.setWindowTitle(f"Package Info – {name}")
+        if info is None:
+            self.info_view.setPlainText(f"No information found for {name}.")
+        else:
+            lines = format_info(info, pkg[3] if pkg else None)
+            for entry in self.engine.advisories.match(name, info["version"]):
+                fix = fixed_in(entry, info["version"])
+                severity = f" [{entry['severity']}]" if entry["severity"] else ""
+                lines.append(f"Advisory: {entry['id']}{severity} {entry['summary']}" + (f" (fixed in {fix})" if fix else ""))
+            self.info_view.setPlainText("\n".join(lines))
+        self.dep_tree.clear()
+        if info is not None:
+            self._add_dep_item(self.dep_tree, name, ()).setExpanded(True)
+        self.info_dock.show()
+
+    def _add_dep_item(self, parent, name, path):
+        # children are added when an item is first expanded; a package already on the path is a cycle
+        dist = self.engine.dists.get(normalize_name(name))
+        item = QTreeWidgetItem(parent, [f"{name} {dist['version']}" if dist else name])
+        if normalize_name(name) in path:
+            item.setText(0, f"{item.text(0)} (cycle)")
+            return item
+        item.setData(0, Qt.ItemDataRole.UserRole, (name, (*path, normalize_name(name))))
+        if self.metadata.deps.requires(name):
+            item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+        return item
+
+    def _expand_dep_item(self, item):
+        data = item.data(0, Qt.ItemDataRole.UserRole)
+        if data is None or item.childCount():
+            return
+        name, path = data
+        for dep in self.metadata.deps.requires(name):
+            self._add_dep_item(item, dep, path)
+
+    def closeEvent(self, event):
+        # stop background work so no QThread is destroyed while it is still running
+        self.loads.cancel()
+        if self.install_thread and self.install_thread.isRunning():
+            self.install_thread.token.cancel()
+        for thread in [*self.loader_threads, self.install_thread, self.scan_thread, self.import_thread, self.deps_thread]:
+            if thread:
+                thread.wait()
+        self.queue.save()
+        self.engine.close()
+        super().closeEvent(event)
\ No newline at end of file
@@ -0,0 +1,254 @@
+# packagetable.py
+from PyQt6.QtWidgets import QStyledItemDelegate
+from PyQt6.QtGui import QColor
+from PyQt6.QtCore import (
+    Qt, QAbstractTableModel, QAbstractProxyModel, QModelIndex, QEvent, QRectF,
+    pyqtSignal
+)
+from pippilot.pipmanager import normalize_name
+
+COL_NAME, COL_INFO, COL_UNINSTALL, COL_STATUS, COL_UPDATE = range(5)
+ACTION_COLUMNS = (COL_INFO, COL_UNINSTALL, COL_UPDATE)
+HEADERS = ("Package", "", "", "Status", "")
+PackageRole = Qt.ItemDataRole.UserRole
+EnabledRole = Qt.ItemDataRole.UserRole + 1
+
+# (label, color, hover color) per action column; Update is greyed out for up-to-date packages
+BUTTONS = {
+    COL_INFO: ("Info", "#555", "#777"),
+    COL_UNINSTALL: ("Uninstall", "#b34040", "#d04e4e"),
+    COL_UPDATE: ("Update", "#98C379", "#85a363"),
+}
+DISABLED_COLOR = "#444"
+VULNERABLE_COLOR = "#E06C75"
+
+def advisories(pkg):
+    return pkg[5] if len(pkg) > 5 else ()
+
+class PackageTableModel(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.packages = []  # PackageStatus rows: (name, version, uptodate, latest, error, advisories)
+        self.keys = []      # normalized name per row
+        self._rows = {}     # normalized name -> row
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.packages)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        pkg = self.packages[index.row()]
+        name, ver, uptodate, latest = pkg[:4]
+        flagged = advisories(pkg)
+        col = index.column()
+        if role == PackageRole:
+            return pkg
+        if role == Qt.ItemDataRole.DisplayRole:
+            if col == COL_NAME:
+                return name
+            if col == COL_STATUS:
+                status = "Up-to-date" if uptodate else f"{ver} → {latest}"
+                return f"⚠ {len(flagged)} advisor{'ies' if len(flagged) > 1 else 'y'} · {status}" if flagged else status
+            if col in BUTTONS:
+                return BUTTONS[col][0]
+        if role == Qt.ItemDataRole.ToolTipRole and col == COL_STATUS and flagged:
+            return f"{name} {ver} is affected by " + ", ".join(flagged)
+        if role == Qt.ItemDataRole.ForegroundRole and col == COL_STATUS:
+            return QColor(VULNERABLE_COLOR if flagged else "#98C379" if uptodate else "#E5C07B")
+        if role == EnabledRole:
+            return not (col == COL_UPDATE and uptodate)
+        return None
+
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsEnabled
+
+    def set_packages(self, packages):
+        self.beginResetModel()
+        self.packages = list(packages)
+        self._reindex()
+        self.endResetModel()
+
+    def _reindex(self):
+        self.keys = [normalize_name(pkg[0]) for pkg in self.packages]
+        self._rows = {key: row for row, key in enumerate(self.keys)}
+
+    def upsert(self, pkg):
+        key = normalize_name(pkg[0])
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self.packages)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.packages.append(pkg)
+            self.keys.append(key)
+            self._rows[key] = row
+            self.endInsertRows()
+        else:
+            self.packages[row] = pkg
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(HEADERS) - 1))
+
+    def merge(self, packages):
+        # Revalidated rows replace the current ones in place, so the view keeps its scroll position;
+        # only a change in which packages are listed costs a reset. Returns the number of rows that changed.
+        fresh = {normalize_name(pkg[0]): pkg for pkg in packages}
+        changed = [row for row, key in enumerate(self.keys) if key in fresh and fresh[key] != self.packages[row]]
+        removed = sum(1 for key in self.keys if key not in fresh)
+        added = [pkg for key, pkg in fresh.items() if key not in self._rows]
+        if removed or added:
+            self.set_packages([fresh[key] for key in self.keys if key in fresh] + added)
+            return len(changed) + removed + len(added)
+        for row in changed:
+            self.packages[row] = fresh[self.keys[row]]
+        if changed:
+            self.dataChanged.emit(self.index(changed[0], 0), self.index(changed[-1], len(HEADERS) - 1))
+        return len(changed)
+
+    def package(self, name):
+        row = self._rows.get(normalize_name(name))
+        return None if row is None else self.packages[row]
+
+    def remove(self, name):
+        row = self._rows.get(normalize_name(name))
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.packages[row]
+        self._reindex()
+        self.endRemoveRows()
+
+class PackageFilterProxy(QAbstractProxyModel):
+    # Sorting and filtering are computed with sorted()/set lookups over the source rows
+    # rather than per-comparison lessThan() callbacks, and applied as a single reset.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.outdated_first = False
+        self.matches = None  # normalized name -> search score, None when not searching
+        self._order = []     # proxy row -> source row
+        self._position = {}  # source row -> proxy row
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        for about, done in (
+            (model.modelAboutToBeReset, model.modelReset),
+            (model.rowsAboutToBeInserted, model.rowsInserted),
+            (model.rowsAboutToBeRemoved, model.rowsRemoved),
+        ):
+            about.connect(self.beginResetModel)
+            done.connect(self._finish_reset)
+        model.dataChanged.connect(self._refresh)
+        self._refresh()
+
+    def set_outdated_first(self, enabled):
+        self.outdated_first = enabled
+        self._refresh()
+
+    def set_matches(self, matches):
+        self.matches = matches
+        self._refresh()
+
+    def _refresh(self, *args):
+        self.beginResetModel()
+        self._finish_reset()
+
+    def _finish_reset(self, *args):
+        model = self.sourceModel()
+        packages, keys, matches = model.packages, model.keys, self.matches
+        outdated_first = self.outdated_first
+        if matches is None:
+            rows = range(len(packages))
+            rank = lambda r: 0
+        else:
+            rows = [r for r, key in enumerate(keys) if key in matches]
+            rank = lambda r: -matches[keys[r]]
+        # vulnerable versions go before merely outdated ones
+        self._order = sorted(
+            rows, key=lambda r: (rank(r), outdated_first and (not advisories(packages[r]), packages[r][2]),
+                                 packages[r][0].lower())
+        )
+        self._position = {src: row for row, src in enumerate(self._order)}
+        self.endResetModel()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self._order)):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        if index is None:
+            return super().parent()
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.sourceModel().columnCount()
+
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self._order[index.row()], index.column())
+
+    def mapFromSource(self, index):
+        row = self._position.get(index.row()) if index.isValid() else None
+        if row is None:
+            return QModelIndex()
+        return self.createIndex(row, index.column())
+
+class ButtonDelegate(QStyledItemDelegate):
+    clicked = pyqtSignal(int, str)  # column, package name
+
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self.hovered = QModelIndex()
+        view.setMouseTracking(True)
+        view.viewport().installEventFilter(self)
+
+    def paint(self, painter, option, index):
+        label, color, hover = BUTTONS[index.column()]
+        enabled = index.data(EnabledRole)
+        if not enabled:
+            color = DISABLED_COLOR
+        elif index == self.hovered:
+            color = hover
+        rect = QRectF(option.rect.adjusted(4, 3, -4, -3))
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(color))
+        painter.drawRoundedRect(rect, 3, 3)
+        painter.setPen(QColor("white"))
+        painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, label)
+        painter.restore()
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.Type.MouseMove, QEvent.Type.Leave):
+            index = QModelIndex()
+            if event.type() == QEvent.Type.MouseMove:
+                index = self.view.indexAt(event.position().toPoint())
+                if index.column() not in ACTION_COLUMNS or not index.data(EnabledRole):
+                    index = QModelIndex()
+            if index != self.hovered:
+                self.hovered = index
+                self.view.viewport().setCursor(
+                    Qt.CursorShape.PointingHandCursor if index.isValid() else Qt.CursorShape.ArrowCursor
+                )
+                self.view.viewport().update()
+        return False
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton
+                and index.data(EnabledRole)):
+            self.clicked.emit(index.column(), index.data(PackageRole)[0])
+            return True
+        return False
@@ -0,0 +1,7 @@
+# pipPilot core: package scanning, index lookups and pip execution without any UI
+from .pipmanager import normalize_name
+from .opqueue import INSTALL, UNINSTALL
+from .engine import Engine, PackageStatus, outdated
+from .tracing import tracer, span
+
+__all__ = ["Engine", "PackageStatus", "outdated", "normalize_name", "INSTALL", "UNINSTALL", "tracer", "span"]
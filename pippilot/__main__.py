@@ -0,0 +1,367 @@
+# __main__.py
+import os, sys, json, time, shutil, asyncio, argparse, tempfile
+from .engine import Engine, PackageStatus, outdated
+from .pypi import LookupEngine
+from .cache import MetadataCache
+from .pipmanager import normalize_name, get_installed_packages
+from .opqueue import INSTALL, UNINSTALL
+from .lockfile import write_lock, format_lock, read_lock, diff, restore_specs, direction
+from .upgrade import ResolutionError
+from .discovery import find_environments, discover_interpreters
+from .fleet import scan_fleet
+from .advisories import AdvisoryDatabase
+from .tracing import tracer
+
+EXIT_OK = 0
+EXIT_OUTDATED = 1            # outdated packages found, or the upgrade plan isn't empty
+EXIT_USAGE = 2               # bad arguments (argparse)
+EXIT_LOOKUP_FAILED = 3       # some packages couldn't be checked, so the answer is incomplete
+EXIT_RESOLUTION_FAILED = 4
+EXIT_INSTALL_FAILED = 5
+EXIT_VULNERABLE = 6          # an imported advisory affects an installed version; takes precedence over 1 and 3
+EXIT_INTERRUPTED = 130
+
+def emit(record):
+    sys.stdout.write(json.dumps(record) + "\n")
+    sys.stdout.flush()
+
+def package_record(status):
+    return {"type": "package", "name": status.name, "version": status.version,
+            "latest": status.latest, "uptodate": status.uptodate, "error": status.error,
+            "advisories": list(status.advisories)}
+
+def make_engine(args):
+    cache = None if args.no_cache else MetadataCache()
+    return Engine(getattr(args, "python", sys.executable), lookup=LookupEngine(args.index_url, cache=cache))
+
+async def check(engine, args):
+    # streams a record per package as its lookup completes; returns (statuses, names that aren't installed)
+    def on_result(status):
+        if args.json and (getattr(args, "all", False) or not status.uptodate or status.error or status.advisories):
+            emit(package_record(status))
+
+    installed = await engine.scan()
+    missing = []
+    if args.packages:
+        wanted = {normalize_name(name): name for name in args.packages}
+        installed = {name: ver for name, ver in installed.items() if normalize_name(name) in wanted}
+        found = {normalize_name(name) for name in installed}
+        missing = [name for key, name in wanted.items() if key not in found]
+    statuses = await engine.check_outdated(installed, on_result)
+    for name in missing:
+        if args.json:
+            emit(package_record(PackageStatus(name, None, None, None, "not installed")))
+    return statuses, missing
+
+def report(args, statuses, missing, started, **extra):
+    pending = outdated(statuses)
+    failed = [(s.name, s.error) for s in statuses if s.error] + [(name, "not installed") for name in missing]
+    if args.json:
+        emit({"type": "summary", "checked": len(statuses), "outdated": len(pending), "failed": len(failed),
+              "vulnerable": sum(1 for s in statuses if s.advisories), **extra, "seconds": round(time.perf_counter() - started, 3)})
+        return
+    for name, error in failed:
+        print(f"{name}: {error}", file=sys.stderr)
+    print(f"{len(statuses)} checked, {len(pending)} outdated, {len(failed)} failed "
+          f"in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+async def cmd_outdated(engine, args):
+    started = time.perf_counter()
+    statuses, missing = await check(engine, args)
+    pending = outdated(statuses)
+    if not args.json:
+        listed = statuses if args.all else [s for s in statuses if not s.uptodate or s.advisories]
+        for status in sorted(listed, key=lambda s: s.name.lower()):
+            print(f"{status.name} {status.version}" + ("" if status.uptodate else f" -> {status.latest}")
+                  + (f"  ! {', '.join(status.advisories)}" if status.advisories else ""))
+    report(args, statuses, missing, started)
+    # matching advisories is offline, so a failed lookup doesn't make it any less certain
+    if any(s.advisories for s in statuses):
+        return EXIT_VULNERABLE
+    if missing or any(s.error for s in statuses):
+        return EXIT_LOOKUP_FAILED
+    return EXIT_OUTDATED if pending else EXIT_OK
+
+async def cmd_upgrade(engine, args):
+    started = time.perf_counter()
+    statuses, missing = await check(engine, args)
+    incomplete = bool(missing) or any(s.error for s in statuses)
+    pending = sorted(outdated(statuses), key=lambda s: s.name.lower())
+    if not args.json:
+        for status in pending:
+            print(f"{status.name} {status.version} -> {status.latest}")
+    if not pending:
+        report(args, statuses, missing, started, planned=0)
+        return EXIT_LOOKUP_FAILED if incomplete else EXIT_OK
+
+    try:
+        plan = await engine.plan([s.name for s in pending])
+    except ResolutionError as e:
+        if args.json:
+            emit({"type": "error", "stage": "resolve", "message": str(e)})
+        else:
+            print(f"Conflicts found, nothing was installed:\n{e}", file=sys.stderr)
+        report(args, statuses, missing, started, planned=0)
+        return EXIT_RESOLUTION_FAILED
+    for item in plan:
+        if args.json:
+            emit({"type": "install", "name": item["name"], "version": item["version"], "url": item["url"]})
+        else:
+            print(f"  install {item['name']} {item['version']}")
+    if args.plan or not plan:
+        report(args, statuses, missing, started, planned=len(plan))
+        if incomplete:
+            return EXIT_LOOKUP_FAILED
+        return EXIT_OUTDATED if plan else EXIT_OK
+
+    # pip's own output goes to stderr so stdout stays machine-readable
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            targets = await engine.download(plan, tmp)
+            code = await engine.install(targets, on_line=lambda line: print(line, file=sys.stderr))
+    except Exception as e:
+        code, message = None, str(e)
+    else:
+        message = f"pip exited with code {code}"
+    report(args, statuses, missing, started, planned=len(plan), installed=len(plan) if code == 0 else 0)
+    if code != 0:
+        if args.json:
+            emit({"type": "error", "stage": "install", "message": message})
+        else:
+            print(message, file=sys.stderr)
+        return EXIT_INSTALL_FAILED
+    return EXIT_LOOKUP_FAILED if incomplete else EXIT_OK
+
+def fleet_interpreters(args):
+    # each path is an interpreter, an environment, or a directory searched for environments
+    found = [info["path"] for info in discover_interpreters()] if args.discovered else []
+    for path in args.paths:
+        if os.path.isfile(path):
+            found.append(path)
+        else:
+            found += find_environments(path, args.depth)
+    return list(dict.fromkeys(os.path.abspath(p) for p in found))
+
+async def cmd_fleet(engine, args):
+    started = time.perf_counter()
+    interpreters = fleet_interpreters(args)
+    if not interpreters:
+        print("No environments found.", file=sys.stderr)
+        return EXIT_USAGE
+
+    def on_scanned(interpreter, packages, error):
+        if args.json:
+            emit({"type": "scanned", "python": interpreter, "packages": len(packages), "error": error})
+
+    fleet_report = await asyncio.to_thread(scan_fleet, interpreters, engine.lookup, args.workers, on_scanned)
+    environments = fleet_report["environments"]
+    failed = [env for env in environments if env["error"]]
+    if args.json:
+        for env in environments:
+            emit({"type": "environment", **env})
+        for entry in fleet_report["outdated"]:
+            emit({"type": "outdated", **entry})
+    else:
+        for entry in fleet_report["outdated"]:
+            print(f"{entry['name']} -> {entry['latest']}")
+            for version, envs in sorted(entry["installed"].items()):
+                print(f"  {version}: {len(envs)} env(s)")
+                for interpreter in envs:
+                    print(f"    {interpreter}")
+        for env in failed:
+            print(f"{env['python']}: {env['error']}", file=sys.stderr)
+    affected = sum(1 for env in environments if env["outdated"])
+    summary = {"environments": len(environments), "failed": len(failed),
+               "packages": sum(env["packages"] for env in environments), "lookups": fleet_report["lookups"],
+               "failed_lookups": fleet_report["failed_lookups"], "outdated": len(fleet_report["outdated"]),
+               "affected": affected, "seconds": round(time.perf_counter() - started, 3)}
+    if args.json:
+        emit({"type": "summary", **summary})
+    else:
+        print(f"{summary['environments']} environments, {summary['packages']} packages, {summary['lookups']} "
+              f"distinct lookups; {summary['outdated']} projects outdated in {affected} environments "
+              f"in {summary['seconds']:.2f}s", file=sys.stderr)
+    if failed or fleet_report["failed_lookups"]:
+        return EXIT_LOOKUP_FAILED
+    return EXIT_OUTDATED if fleet_report["outdated"] else EXIT_OK
+
+async def load_packages(engine, path):
+    # an interpreter, an environment directory or a lock file -> {name: version}
+    if path is None:
+        return await engine.scan()
+    if os.path.isdir(path):
+        found = find_environments(path, 0)
+        if not found:
+            raise ValueError(f"{path} is not an environment")
+        path = found[0]
+    # whatever can be executed is an interpreter (python3.12, pypy3, a venv's python.exe); on
+    # Windows which() goes by PATHEXT, so a lock file is never mistaken for one
+    if shutil.which(os.path.abspath(path)):
+        packages = await asyncio.to_thread(get_installed_packages, os.path.abspath(path))
+        if not packages:
+            raise ValueError(f"no packages found for {path}")
+        return packages
+    return read_lock(path)
+
+def print_diff(args, changes):
+    for name, version in sorted(changes["install"].items(), key=lambda kv: kv[0].lower()):
+        if args.json:
+            emit({"type": "diff", "name": name, "change": "install", "installed": None, "wanted": version})
+        else:
+            print(f"+ {name}" + (f"=={version}" if version else ""))
+    for name, (installed, wanted) in sorted(changes["change"].items(), key=lambda kv: kv[0].lower()):
+        if args.json:
+            emit({"type": "diff", "name": name, "change": direction(installed, wanted), "installed": installed, "wanted": wanted})
+        else:
+            print(f"~ {name} {installed} -> {wanted}")
+    for name, version in sorted(changes["remove"].items(), key=lambda kv: kv[0].lower()):
+        if args.json:
+            emit({"type": "diff", "name": name, "change": "remove", "installed": version, "wanted": None})
+        else:
+            print(f"- {name}=={version}")
+
+def diff_summary(args, changes, started, **extra):
+    counts = {key: len(changes[key]) for key in ("install", "change", "remove")}
+    if args.json:
+        emit({"type": "summary", **counts, **extra, "seconds": round(time.perf_counter() - started, 3)})
+    else:
+        print(f"{counts['install']} to install, {counts['change']} to change, {counts['remove']} to remove "
+              f"in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+async def cmd_export(engine, args):
+    packages = await engine.scan()
+    if args.output:
+        write_lock(packages, args.output, args.python)
+        if args.json:
+            emit({"type": "exported", "path": args.output, "packages": len(packages)})
+        else:
+            print(f"{len(packages)} packages written to {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.write(format_lock(packages, args.python))
+    return EXIT_OK
+
+async def cmd_diff(engine, args):
+    # the changes that would make the first side (default: --python) match the second
+    started = time.perf_counter()
+    if len(args.sources) > 2:
+        print("diff takes one or two environments or lock files", file=sys.stderr)
+        return EXIT_USAGE
+    current, wanted = args.sources if len(args.sources) == 2 else (None, args.sources[0])
+    try:
+        current, wanted = await asyncio.gather(load_packages(engine, current), load_packages(engine, wanted))
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return EXIT_USAGE
+    changes = diff(current, wanted)
+    print_diff(args, changes)
+    diff_summary(args, changes, started)
+    return EXIT_OUTDATED if any(changes.values()) else EXIT_OK
+
+async def cmd_restore(engine, args):
+    # one pip install for everything missing or at another version; --prune uninstalls the rest after it
+    started = time.perf_counter()
+    try:
+        current, wanted = await asyncio.gather(engine.scan(), load_packages(engine, args.source))
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return EXIT_USAGE
+    changes = diff(current, wanted)
+    if not args.prune:
+        changes["remove"] = {}
+    print_diff(args, changes)
+    specs = restore_specs(changes)
+    if args.plan or not any(changes.values()):
+        diff_summary(args, changes, started, applied=False)
+        return EXIT_OUTDATED if any(changes.values()) else EXIT_OK
+
+    on_line = lambda line: print(line, file=sys.stderr)
+    code = 0
+    if specs:
+        # a requirements file keeps the command line short with thousands of pins
+        code = await engine.execute(INSTALL, specs, on_line, as_file=True)
+    if code == 0 and changes["remove"]:
+        code = await engine.execute(UNINSTALL, sorted(changes["remove"]), on_line)
+    diff_summary(args, changes, started, applied=code == 0)
+    if code != 0:
+        message = f"pip exited with code {code}"
+        if args.json:
+            emit({"type": "error", "stage": "install", "message": message})
+        else:
+            print(message, file=sys.stderr)
+        return EXIT_INSTALL_FAILED
+    return EXIT_OK
+
+async def cmd_import_advisories(engine, args):
+    started = time.perf_counter()
+    database = engine.advisories or AdvisoryDatabase()
+    try:
+        count = await asyncio.to_thread(database.import_from, args.source)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return EXIT_USAGE
+    packages = len(database.packages)
+    if args.json:
+        emit({"type": "imported", "advisories": count, "packages": packages, "path": database.path,
+              "seconds": round(time.perf_counter() - started, 3)})
+    else:
+        print(f"{count} advisories for {packages} packages imported into {database.path} "
+              f"in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return EXIT_OK
+
+COMMANDS = {"outdated": cmd_outdated, "upgrade": cmd_upgrade, "fleet": cmd_fleet,
+            "export": cmd_export, "diff": cmd_diff, "restore": cmd_restore,
+            "import-advisories": cmd_import_advisories}
+
+def main(argv=None):
+    shared = argparse.ArgumentParser(add_help=False)
+    shared.add_argument("--json", action="store_true", help="stream NDJSON records as results come in")
+    shared.add_argument("--index-url", help="package index (default: $PIPPILOT_INDEX_URL or PyPI)")
+    shared.add_argument("--no-cache", action="store_true", help="ignore the lookup cache")
+    shared.add_argument("--trace", metavar="FILE", help="write a Chrome trace of the run to FILE")
+    python = argparse.ArgumentParser(add_help=False)
+    python.add_argument("--python", default=sys.executable, help="interpreter whose environment is used")
+    common = argparse.ArgumentParser(add_help=False, parents=[shared, python])
+    common.add_argument("packages", nargs="*", help="limit to these installed packages")
+    parser = argparse.ArgumentParser(prog="pippilot", description="Check and upgrade packages without a UI.",
+                                     epilog="exit codes: 0 ok, 1 outdated / plan not empty / environments differ, 2 usage, "
+                                            "3 lookups failed, 4 resolution failed, 5 install failed, "
+                                            "6 vulnerable versions installed (before 3 and 1)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sub = commands.add_parser("outdated", parents=[common], help="list packages with a newer release")
+    sub.add_argument("--all", action="store_true", help="report up-to-date packages too")
+    sub = commands.add_parser("upgrade", parents=[common], help="upgrade outdated packages in one resolver pass")
+    sub.add_argument("--plan", action="store_true", help="only resolve and print what would be installed")
+    sub = commands.add_parser("fleet", parents=[shared], help="check many environments, looking each project up once")
+    sub.add_argument("paths", nargs="*", help="interpreters, environments, or directories to search for environments")
+    sub.add_argument("--discovered", action="store_true", help="include every interpreter found on this machine")
+    sub.add_argument("--depth", type=int, default=4, help="how deep to search directories (default: 4)")
+    sub.add_argument("--workers", type=int, help="scan processes (default: one per CPU)")
+    sub = commands.add_parser("export", parents=[shared, python], help="write the installed packages as a pinned lock file")
+    sub.add_argument("-o", "--output", help="file to write (default: stdout)")
+    sub = commands.add_parser("diff", parents=[shared, python],
+                              help="show what would make one environment match another environment or lock file")
+    sub.add_argument("sources", nargs="+", metavar="source",
+                     help="[from] to: interpreters, environment directories or lock files; from defaults to --python")
+    sub = commands.add_parser("restore", parents=[shared, python], help="make --python match an environment or lock file")
+    sub.add_argument("source", help="interpreter, environment directory or lock file to match")
+    sub.add_argument("--prune", action="store_true", help="also uninstall packages the source doesn't have")
+    sub.add_argument("--plan", action="store_true", help="only print the changes")
+    sub = commands.add_parser("import-advisories", parents=[shared],
+                              help="import an OSV advisory dump (directory, .zip or .json) for offline matching")
+    sub.add_argument("source")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        tracer.enabled = True
+    engine = make_engine(args)
+    try:
+        return asyncio.run(COMMANDS[args.command](engine, args))
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    finally:
+        engine.close()
+        if args.trace:
+            tracer.export(args.trace)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+# advisories.py
+import os, json, time, zipfile, threading
+from .cache import default_cache_dir
+from .pipmanager import normalize_name
+
+FORMAT = 1
+SUMMARY_LIMIT = 200
+
+def _documents(source):
+    # OSV records from a directory tree of .json files, a .zip of them (OSV's PyPI all.zip) or one
+    # .json file holding a record or a list of records
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for filename in files:
+                if filename.endswith(".json"):
+                    with open(os.path.join(root, filename), "rb") as f:
+                        yield from _records(f.read())
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for member in archive.namelist():
+                if member.endswith(".json"):
+                    yield from _records(archive.read(member))
+    else:
+        with open(source, "rb") as f:
+            yield from _records(f.read())
+
+def _records(data):
+    try:
+        doc = json.loads(data)
+    except ValueError:
+        return
+    for record in doc if isinstance(doc, list) else [doc]:
+        if isinstance(record, dict) and record.get("id"):
+            yield record
+
+def _severity(record):
+    specific = record.get("database_specific") or {}
+    return specific.get("severity") or ""
+
+def _intervals(ranges):
+    # ECOSYSTEM ranges -> [[introduced, fixed or None, fixed is inclusive (last_affected)]], events
+    # ordered by version as OSV evaluation requires; "0" (everything before) becomes None
+    from packaging.version import Version, InvalidVersion
+
+    def key(event):
+        version = next(iter(event.values()))
+        try:
+            return (0, Version(version)) if version != "0" else (-1,)
+        except InvalidVersion:
+            return (1, version)
+
+    intervals = []
+    for r in ranges:
+        if r.get("type") != "ECOSYSTEM":
+            continue
+        start = opened = None
+        for event in sorted((e for e in r.get("events", []) if e), key=key):
+            if "introduced" in event:
+                start, opened = None if event["introduced"] == "0" else event["introduced"], True
+            elif opened and ("fixed" in event or "last_affected" in event):
+                end = event.get("fixed", event.get("last_affected"))
+                intervals.append([start, end, "fixed" not in event])
+                opened = False
+        if opened:
+            intervals.append([start, None, False])
+    return intervals
+
+def parse_record(record):
+    # -> {normalized name: entry} for the PyPI packages an OSV record affects
+    entries = {}
+    for affected in record.get("affected", []):
+        package = affected.get("package") or {}
+        if package.get("ecosystem") != "PyPI" or not package.get("name"):
+            continue
+        intervals = _intervals(affected.get("ranges", []))
+        entry = entries.setdefault(normalize_name(package["name"]), {
+            "id": record["id"], "summary": (record.get("summary") or record.get("details") or "")[:SUMMARY_LIMIT],
+            "severity": _severity(record), "aliases": record.get("aliases", []), "ranges": [], "versions": [],
+        })
+        entry["ranges"] += intervals
+        if not intervals:
+            # the enumerated list is only needed when there are no ranges to go by
+            entry["versions"] += affected.get("versions", [])
+    return entries
+
+class _Matcher:
+    # one package's advisories with the range bounds parsed, built on the first lookup of that package
+    def __init__(self, entries):
+        from packaging.version import Version, InvalidVersion
+        self.entries = entries
+        self.versions = [set(entry["versions"]) for entry in entries]
+        self.ranges = []
+        for i, entry in enumerate(entries):
+            for start, end, inclusive in entry["ranges"]:
+                try:
+                    self.ranges.append((i, start and Version(start), end and Version(end), inclusive))
+                except InvalidVersion:
+                    pass
+
+    def match(self, version):
+        from packaging.version import Version, InvalidVersion
+        hits = {i for i, versions in enumerate(self.versions) if version in versions}
+        try:
+            v = Version(version)
+        except InvalidVersion:
+            v = None
+        if v is not None:
+            for i, start, end, inclusive in self.ranges:
+                if (start is None or v >= start) and (end is None or v < end or (inclusive and v == end)):
+                    hits.add(i)
+        return [self.entries[i] for i in sorted(hits)]
+
+class AdvisoryDatabase:
+    # OSV advisories for PyPI, imported once into a local file keyed by normalized project name, so
+    # matching a package is a dict lookup plus its own few ranges, with no network access.
+    def __init__(self, path=None):
+        self.path = path or os.path.join(default_cache_dir(), "advisories.json")
+        self.packages = None  # normalized name -> [entry]; loaded on first use
+        self.count = 0
+        self.imported = None
+        self._matchers = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self.packages is not None:
+                return
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("format") != FORMAT:
+                    raise ValueError("unknown format")
+                self.packages, self.count, self.imported = data["packages"], data["count"], data["imported"]
+            except (OSError, ValueError, KeyError):
+                self.packages = {}
+
+    def import_from(self, source):
+        # replaces the database with what source holds; returns the number of advisories imported
+        packages, ids = {}, set()
+        for record in _documents(source):
+            if record.get("withdrawn"):
+                continue
+            for key, entry in parse_record(record).items():
+                packages.setdefault(key, []).append(entry)
+                ids.add(record["id"])
+        data = {"format": FORMAT, "imported": int(time.time()), "source": os.path.abspath(source),
+                "count": len(ids), "packages": packages}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        with self._lock:
+            self.packages, self.count, self.imported = packages, len(ids), data["imported"]
+            self._matchers = {}
+        return len(ids)
+
+    def match(self, name, version):
+        # advisory entries (id, summary, severity, aliases, ranges) affecting this installed version
+        self.load()
+        key = normalize_name(name)
+        entries = self.packages.get(key)
+        if not entries:
+            return []
+        with self._lock:
+            matcher = self._matchers.get(key)
+            if matcher is None:
+                matcher = self._matchers[key] = _Matcher(entries)
+        return matcher.match(version)
+
+def fixed_in(entry, version):
+    # the lowest fix above version among the entry's ranges, or None
+    from packaging.version import Version, InvalidVersion
+    fixes = []
+    for start, end, inclusive in entry["ranges"]:
+        try:
+            if end and not inclusive and Version(end) > Version(version):
+                fixes.append((Version(end), end))
+        except InvalidVersion:
+            pass
+    return min(fixes)[1] if fixes else None
@@ -0,0 +1,111 @@
+# cache.py
+import os, sys, json, time, threading
+from collections import OrderedDict
+from .pipmanager import normalize_name
+
+DEFAULT_TTL = 3600
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+
+def default_cache_dir():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "pippilot")
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+class MetadataCache:
+    def __init__(self, path=None, ttl=None, max_bytes=None):
+        self.path = path or os.path.join(default_cache_dir(), "index-cache.json")
+        self.ttl = ttl if ttl is not None else int(os.environ.get("PIPPILOT_CACHE_TTL", DEFAULT_TTL))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.environ.get("PIPPILOT_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.entries = OrderedDict()  # least recently used first
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.reset_stats()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, entry in sorted(data.items(), key=lambda kv: kv[1].get("accessed", 0)):
+            self.entries[key] = entry
+            self.total_bytes += entry.get("stored", 0)
+
+    def reset_stats(self):
+        self.stats = {"hits": 0, "misses": 0, "revalidations": 0, "bytes_saved": 0}
+
+    def summary(self):
+        s = self.stats
+        return (f"Cache: {s['hits']} hits, {s['revalidations']} revalidated, "
+                f"{s['misses']} misses, {format_bytes(s['bytes_saved'])} saved")
+
+    def get(self, name):
+        key = normalize_name(name)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                entry["accessed"] = time.time()
+            return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry["fetched"] < self.ttl
+
+    def hit(self, entry):
+        with self._lock:
+            self.stats["hits"] += 1
+            self.stats["bytes_saved"] += entry.get("size", 0)
+            self._dirty = True
+
+    def revalidated(self, entry):
+        with self._lock:
+            entry["fetched"] = time.time()
+            self.stats["revalidations"] += 1
+            self.stats["bytes_saved"] += entry.get("size", 0)
+            self._dirty = True
+
+    def put(self, name, data, etag=None, last_modified=None, size=0):
+        key = normalize_name(name)
+        now = time.time()
+        entry = {
+            "data": data, "etag": etag, "last_modified": last_modified,
+            "fetched": now, "accessed": now, "size": size,
+        }
+        entry["stored"] = len(json.dumps(entry))
+        with self._lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old.get("stored", 0)
+            self.entries[key] = entry
+            self.total_bytes += entry["stored"]
+            self.stats["misses"] += 1
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.get("stored", 0)
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dict(self.entries)
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
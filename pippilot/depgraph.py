@@ -0,0 +1,155 @@
+# depgraph.py
+import re, json, threading, subprocess
+from .pipmanager import normalize_name, requirement_name
+
+_ENV_PROBE = (
+    "import json\ntry:\n    from packaging.markers import default_environment\n"
+    "except ImportError:\n    from pip._vendor.packaging.markers import default_environment\n"
+    "print(json.dumps(default_environment()))"
+)
+_EXTRA = re.compile(r"""\bextra\s*==\s*['"]([^'"]+)['"]""")
+
+def marker_environment(interpreter):
+    # PEP 508 marker values of the target interpreter, which needn't be the one running pipPilot
+    try:
+        out = subprocess.run([interpreter, "-c", _ENV_PROBE], capture_output=True, text=True, timeout=30)
+        if out.returncode == 0:
+            return json.loads(out.stdout)
+    except (OSError, subprocess.SubprocessError, ValueError):
+        pass
+    from packaging.markers import default_environment
+    return default_environment()
+
+def _applies(marker, environment, extra=""):
+    try:
+        return marker.evaluate(dict(environment, extra=extra))
+    except Exception:
+        return False  # a marker this packaging can't evaluate
+
+def parse_requirements(specs, environment):
+    # Requires-Dist entries -> (requirements, {extra: requirements}), each requirement being
+    # (normalized name, requested extras); markers that don't hold in environment are dropped
+    from packaging.requirements import Requirement, InvalidRequirement
+    base, extras = [], {}
+    for spec in specs:
+        try:
+            req = Requirement(spec)
+        except InvalidRequirement:
+            name = requirement_name(spec)
+            if name and ";" not in spec:
+                base.append((normalize_name(name), ()))
+            continue
+        dep = (normalize_name(req.name), tuple(sorted(normalize_name(e) for e in req.extras)))
+        if req.marker is None:
+            base.append(dep)
+            continue
+        wanted = _EXTRA.findall(str(req.marker))
+        if not wanted and _applies(req.marker, environment):
+            base.append(dep)
+        for extra in wanted:
+            if _applies(req.marker, environment, extra):
+                extras.setdefault(normalize_name(extra), []).append(dep)
+    return base, extras
+
+class DependencyIndex:
+    # Requires/required-by edges between the installed distributions of one interpreter. A
+    # requirement on "b[x]" also links to whatever b's extra x pulls in. sync() follows a scan:
+    # parsed requirements are kept on the scanner's dist records, so only distributions the scanner
+    # re-read are parsed again, and only their edges (and edges through their extras) are relinked.
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.names = {}         # normalized name -> display name, installed only
+        self._requires = {}     # normalized name -> normalized names it needs (installed or not)
+        self._required_by = {}  # normalized name -> normalized names that need it
+        self._via_extras = {}   # normalized name -> packages whose extras its edges came through
+        self._dists = {}
+        self._environment = None
+        self._lock = threading.Lock()
+
+    @property
+    def environment(self):
+        if self._environment is None:
+            self._environment = marker_environment(self.interpreter)
+        return self._environment
+
+    def _parsed(self, dist, read_info):
+        parsed = dist.get("requirements")
+        if parsed is None:
+            parsed = dist["requirements"] = parse_requirements(read_info(dist)["requirements"], self.environment)
+        return parsed
+
+    def _edges(self, key, parsed):
+        edges, expanded, seen = set(), set(), set()
+        stack = list(parsed[key][0])
+        while stack:
+            dep, extras = stack.pop()
+            edges.add(dep)
+            if extras:
+                expanded.add(dep)  # relinked when dep is installed, upgraded or removed
+            for extra in extras:
+                if dep in parsed and (dep, extra) not in seen:
+                    seen.add((dep, extra))
+                    stack.extend(parsed[dep][1].get(extra, ()))
+        edges.discard(key)
+        return edges, expanded
+
+    def sync(self, dists, read_info):
+        # dists: the scanner's {normalized name: dist record}; read_info(dist) -> {"requirements": [...]}
+        with self._lock:
+            if dists is self._dists:
+                return
+            changed = {key for key, dist in dists.items() if self._dists.get(key) is not dist}
+            changed |= self._dists.keys() - dists.keys()
+            parsed = {key: self._parsed(dist, read_info) for key, dist in dists.items()}
+            affected = changed | {key for key, via in self._via_extras.items() if via & changed}
+            for key in affected:
+                for dep in self._requires.pop(key, ()):
+                    self._required_by.get(dep, set()).discard(key)
+                self._via_extras.pop(key, None)
+                if key in parsed:
+                    edges, via = self._edges(key, parsed)
+                    self._requires[key] = edges
+                    if via:
+                        self._via_extras[key] = via
+                    for dep in edges:
+                        self._required_by.setdefault(dep, set()).add(key)
+            self.names = {key: dist["name"] for key, dist in dists.items()}
+            self._dists = dists
+
+    def _sorted(self, keys):
+        return sorted((self.names[k] for k in keys if k in self.names), key=str.lower)
+
+    def requires(self, name):
+        # what name needs, including requirements that aren't installed (under their normalized name)
+        with self._lock:
+            return sorted((self.names.get(k, k) for k in self._requires.get(normalize_name(name), ())), key=str.lower)
+
+    def required_by(self, name):
+        with self._lock:
+            return self._sorted(self._required_by.get(normalize_name(name), ()))
+
+    def _closure(self, keys, skip=()):
+        seen, stack = set(), list(keys)
+        while stack:
+            for dep in self._requires.get(stack.pop(), ()):
+                if dep not in seen and dep not in skip and dep in self.names:
+                    seen.add(dep)
+                    stack.append(dep)
+        return seen
+
+    def closure(self, names):
+        # everything installed that names need, directly or not
+        keys = {normalize_name(n) for n in names}
+        with self._lock:
+            return self._sorted(self._closure(keys) - keys)
+
+    def orphans(self, names):
+        # dependencies of names that nothing else installed would need once names are removed
+        removed = {normalize_name(n) for n in names}
+        with self._lock:
+            candidates = self._closure(removed) - removed
+            # whatever a package outside the removed subgraph needs stays, along with its own dependencies
+            kept = {c for c in candidates if any(p not in removed and p not in candidates and p in self.names
+                                                 for p in self._required_by.get(c, ()))}
+            kept |= self._closure(kept, removed)
+            return self._sorted(candidates - kept)
@@ -0,0 +1,173 @@
+# discovery.py
+import os, re, sys, json, glob, shutil, subprocess, threading
+from concurrent.futures import ThreadPoolExecutor
+from .cache import default_cache_dir
+
+PROBE_TIMEOUT = 5
+_PROBE = (
+    "import sys, platform, json; print(json.dumps({'version': platform.python_version(), "
+    "'implementation': platform.python_implementation(), 'prefix': sys.prefix}))"
+)
+_PYTHON_NAME = re.compile(r"^python(\d(\.\d+)?)?(\.exe)?$", re.IGNORECASE)
+_CONDA_ROOTS = ("anaconda3", "miniconda3", "miniforge3", "mambaforge", ".conda")
+_PROJECT_ENVS = (".venv", "venv", "env")
+_SKIP_DIRS = {".git", ".hg", "node_modules", "__pycache__", "site-packages"}
+_cache_lock = threading.Lock()
+
+def _cache_path():
+    return os.path.join(default_cache_dir(), "interpreters.json")
+
+def _load_cache():
+    try:
+        with open(_cache_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache(data):
+    try:
+        os.makedirs(default_cache_dir(), exist_ok=True)
+        with open(_cache_path(), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    except OSError:
+        pass
+
+def _env_python(root):
+    for rel in ("bin/python", "Scripts/python.exe", "python.exe"):
+        path = os.path.join(root, rel)
+        if os.path.isfile(path):
+            return [path]
+    return []
+
+def _from_path():
+    found = []
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        found += [os.path.join(directory, n) for n in names if _PYTHON_NAME.match(n)]
+    for exe in ("python", "python3", "py"):
+        path = shutil.which(exe)
+        if path:
+            found.append(path)
+    return found
+
+def _from_pyenv():
+    root = os.environ.get("PYENV_ROOT") or os.path.expanduser("~/.pyenv")
+    return [p for d in glob.glob(os.path.join(root, "versions", "*")) for p in _env_python(d)]
+
+def _from_conda():
+    roots = [os.path.expanduser(f"~/{name}") for name in _CONDA_ROOTS]
+    if os.environ.get("CONDA_PREFIX"):
+        roots.append(os.environ["CONDA_PREFIX"])
+    envs = []
+    for root in roots:
+        envs.append(root)
+        envs += glob.glob(os.path.join(root, "envs", "*"))
+    try:
+        with open(os.path.expanduser("~/.conda/environments.txt"), encoding="utf-8") as f:
+            envs += [line.strip() for line in f if line.strip()]
+    except OSError:
+        pass
+    return [p for env in envs for p in _env_python(env)]
+
+def _from_virtualenvs():
+    home = os.environ.get("WORKON_HOME") or os.path.expanduser("~/.virtualenvs")
+    return [p for d in glob.glob(os.path.join(home, "*")) for p in _env_python(d)]
+
+def _from_project(cwd=None):
+    cwd = cwd or os.getcwd()
+    return [p for name in _PROJECT_ENVS for p in _env_python(os.path.join(cwd, name))]
+
+def _is_env(path):
+    return os.path.isfile(os.path.join(path, "pyvenv.cfg")) or os.path.isdir(os.path.join(path, "conda-meta"))
+
+def find_environments(root, max_depth=4):
+    # every venv/virtualenv/conda env below root; an environment's own tree isn't searched further,
+    # except for a conda base's envs/ directory
+    found, stack = [], [(os.path.abspath(root), 0)]
+    while stack:
+        path, depth = stack.pop()
+        if _is_env(path):
+            found += _env_python(path)
+            if os.path.isdir(os.path.join(path, "envs")):
+                stack.append((os.path.join(path, "envs"), depth + 1))
+            continue
+        if depth >= max_depth:
+            continue
+        try:
+            with os.scandir(path) as it:
+                subdirs = [e.path for e in it if e.name not in _SKIP_DIRS and e.is_dir(follow_symlinks=False)]
+        except OSError:
+            continue
+        stack += [(d, depth + 1) for d in subdirs]
+    return sorted(_dedupe(found))
+
+SOURCES = (_from_path, _from_pyenv, _from_conda, _from_virtualenvs, _from_project)
+
+def _dedupe(paths):
+    # python -> python3 -> python3.11 in one bin dir collapse to one entry, but a venv's
+    # python (a symlink to the base interpreter) stays separate because its directory differs
+    seen, result = set(), []
+    for path in paths:
+        path = os.path.abspath(path)
+        if not os.path.isfile(path):
+            continue
+        key = (os.path.realpath(os.path.dirname(path)), os.path.realpath(path))
+        if key not in seen:
+            seen.add(key)
+            result.append(path)
+    return result
+
+def _probe(path, cached):
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    entry = cached.get(path)
+    if entry and entry.get("mtime") == mtime:
+        return dict(entry, path=path)
+    try:
+        out = subprocess.run([path, "-c", _PROBE], capture_output=True, text=True, timeout=PROBE_TIMEOUT)
+        info = json.loads(out.stdout)
+    except (OSError, ValueError, subprocess.SubprocessError):
+        info = {"failed": True}  # cached too, so a broken wrapper isn't re-probed every time
+    return dict(info, path=path, mtime=mtime)
+
+def _unique(infos):
+    # wrappers such as pyenv shims resolve to an interpreter that was already found
+    seen, result = set(), []
+    for info in infos:
+        if info.get("failed"):
+            continue
+        key = (info.get("prefix"), info.get("implementation"), info.get("version"))
+        if key not in seen or not info.get("prefix"):
+            seen.add(key)
+            result.append(info)
+    return result
+
+def cached_interpreters():
+    # Instant, probe-free list: the running interpreter plus everything found last time
+    cached = _load_cache()
+    result = [{"path": sys.executable, **cached.get(sys.executable, {})}]
+    result += [dict(info, path=p) for p, info in cached.items() if p != sys.executable and os.path.isfile(p)]
+    return _unique(result)
+
+def discover_interpreters(max_workers=8):
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        paths = [sys.executable]
+        for found in pool.map(lambda source: source(), SOURCES):
+            paths += found
+        paths = _dedupe(paths)
+        cached = _load_cache()
+        probed = [info for info in pool.map(lambda p: _probe(p, cached), paths) if info]
+
+    with _cache_lock:
+        _save_cache({info["path"]: {k: v for k, v in info.items() if k != "path"} for info in probed})
+    return _unique(probed)
+
+def describe(info):
+    if not info.get("version"):
+        return info["path"]
+    return f"{info['implementation']} {info['version']} — {info['path']}"
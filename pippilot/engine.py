@@ -0,0 +1,195 @@
+# engine.py
+import os, asyncio, functools, tempfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from .pipmanager import get_installed_packages, get_scanner
+from .pypi import LookupEngine, MAX_WORKERS
+from .cache import MetadataCache
+from .metadata import MetadataService
+from .tracing import span
+from .tasks import Cancelled, run_cancellable
+from .opqueue import pip_command, INSTALL
+from .pipmanager import requirement_name
+from .wheelhouse import Wheelhouse
+from .advisories import AdvisoryDatabase
+from .upgrade import resolve_upgrade, fetch_artifacts, install_command
+
+KILL_GRACE = 3  # seconds between terminate() and kill() when stopping pip
+
+# advisories: ids of the imported security advisories that affect the installed version
+PackageStatus = namedtuple("PackageStatus", "name version uptodate latest error advisories", defaults=(None, ()))
+
+def outdated(statuses):
+    return [s for s in statuses if not s.uptodate]
+
+def _stop(process):
+    if process.returncode is None:
+        try:
+            process.terminate()
+        except ProcessLookupError:
+            return
+        asyncio.get_running_loop().call_later(KILL_GRACE, _kill, process)
+
+def _kill(process):
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+class Engine:
+    # Async core shared by the GUI and the CLI. Blocking work (directory scans, index requests,
+    # pip's resolver) runs on `executor`, so the caller picks the concurrency: by default a thread
+    # pool sized for index lookups, or any concurrent.futures executor shared with other work.
+    def __init__(self, interpreter, lookup=None, executor=None, max_workers=MAX_WORKERS, wheelhouse=None, advisories=None):
+        self.interpreter = interpreter
+        self.lookup = lookup or LookupEngine(cache=MetadataCache())
+        # wheelhouse=False turns prefetching off; None takes the PIPPILOT_WHEELHOUSE settings
+        self.wheelhouse = Wheelhouse.from_env(interpreter) if wheelhouse is None else wheelhouse or None
+        # advisories=False skips matching; None uses the database imported into the cache directory
+        self.advisories = AdvisoryDatabase() if advisories is None else advisories or None
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers)
+        self._metadata = None
+
+    @property
+    def dists(self):
+        return get_scanner(self.interpreter).dists
+
+    @property
+    def metadata(self):
+        if self._metadata is None:
+            self._metadata = MetadataService(self.interpreter)
+        return self._metadata
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(fn, *args))
+
+    async def scan(self):
+        with span("scan") as s:
+            installed = await self._call(get_installed_packages, self.interpreter)
+            s.set(packages=len(installed))
+            return installed
+
+    async def check_outdated(self, installed, on_result=None, token=None):
+        # on_result(status) fires as each lookup completes; a failed lookup leaves the package
+        # "up to date" with the reason in status.error. Cancelling token aborts in-flight requests,
+        # drops queued ones and raises Cancelled.
+        async def check(name):
+            ver = installed[name]
+            error = None
+            try:
+                latest = await self._call(self.lookup.latest_version, name, token) or ver
+            except Exception as e:
+                if token and token.cancelled:
+                    raise Cancelled() from None
+                latest, error = ver, str(e) or type(e).__name__
+            advisories = ()
+            if loaded:
+                await loaded
+                advisories = tuple(entry["id"] for entry in self.advisories.match(name, ver))
+            status = PackageStatus(name, ver, latest == ver, latest, error, advisories)
+            if on_result:
+                on_result(status)
+            return status
+
+        # the advisory database loads alongside the first lookups; matching is a dict lookup per package
+        loaded = asyncio.ensure_future(self._call(self.advisories.load)) if self.advisories else None
+        with span("check_outdated", packages=len(installed)):
+            statuses = await run_cancellable(asyncio.gather(*(check(name) for name in installed)), token)
+        if self.lookup.cache:
+            with span("cache_save"):
+                await self._call(self.lookup.cache.save)
+        return statuses
+
+    async def latest_version(self, name):
+        try:
+            latest = await self._call(self.lookup.latest_version, name)
+        except Exception:
+            return None
+        if self.lookup.cache:
+            await self._call(self.lookup.cache.save)
+        return latest
+
+    async def info(self, name):
+        # installed metadata plus required-by; None when the package isn't installed
+        return await self._call(self.metadata.get, name)
+
+    async def plan(self, requirements):
+        requirements = list(requirements)
+        with span("resolve", requirements=len(requirements)):
+            return await self._call(resolve_upgrade, self.interpreter, requirements)
+
+    async def download(self, plan, dest):
+        with span("download"):
+            return await self._call(fetch_artifacts, self.lookup.session, plan, dest)
+
+    async def run(self, cmd, on_line=None, on_start=None, token=None, timeout=None):
+        # cancelling token or running past timeout (seconds) terminates the process, then kills it
+        # if it hasn't exited KILL_GRACE seconds later; the return code is whatever it exited with
+        async def pump():
+            async for raw in process.stdout:
+                if on_line:
+                    on_line(raw.decode(errors="replace").rstrip())
+
+        with span("pip", cmd=" ".join(cmd[1:])) as s:
+            process = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+            )
+            if on_start:
+                on_start(process)
+            loop = asyncio.get_running_loop()
+            remove = token.on_cancel(lambda: loop.call_soon_threadsafe(_stop, process)) if token else None
+            try:
+                await asyncio.wait_for(pump(), timeout)
+            except asyncio.TimeoutError:
+                if on_line:
+                    on_line(f"⏱ pip didn't finish within {timeout}s, stopping it.")
+                _stop(process)
+            finally:
+                if remove:
+                    remove()
+            returncode = await process.wait()
+            s.set(returncode=returncode, cancelled=bool(token and token.cancelled))
+            return returncode
+
+    def prefetch(self, statuses, on_done=None):
+        # downloads the wheels the outdated packages would upgrade to, in the background
+        targets = [(s.name, s.latest) for s in statuses if not s.uptodate and s.latest]
+        if self.wheelhouse and targets:
+            self.wheelhouse.prefetch(targets, on_done)
+        return len(targets) if self.wheelhouse else 0
+
+    async def execute(self, action, packages, on_line=None, on_start=None, token=None, timeout=None,
+                      as_file=False, upgrade=True):
+        # as_file hands pip the packages as a requirements file, which keeps the command line
+        # short however many there are (Windows caps it at 32k characters); the prefetched
+        # wheels are upgrades, so a plain install (upgrade=False) doesn't use them
+        find_links, specs = None, packages
+        if self.wheelhouse and action == INSTALL and upgrade:
+            find_links = await self._call(lambda: self.wheelhouse.path)
+            specs = await self._call(self.wheelhouse.local_specs, packages)
+        with tempfile.TemporaryDirectory() as tmp:
+            requirements = None
+            if as_file:
+                requirements = os.path.join(tmp, "requirements.txt")
+                with open(requirements, "w", encoding="utf-8") as f:
+                    f.write("\n".join(specs) + "\n")
+            cmd = pip_command(self.interpreter, action, specs, find_links, requirements, upgrade)
+            code = await self.run(cmd, on_line, on_start, token, timeout)
+        if code == 0 and find_links:
+            await self._call(self.wheelhouse.touch, [requirement_name(p) for p in packages])
+        return code
+
+    async def install(self, targets, on_line=None, on_start=None, token=None, timeout=None):
+        # installs a resolved plan's artifacts in one --no-deps transaction
+        return await self.run(install_command(self.interpreter, targets), on_line, on_start, token, timeout)
+
+    def close(self):
+        if self._own_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self._metadata:
+            self._metadata.close()
+        if self.wheelhouse:
+            self.wheelhouse.close()
+        self.lookup.close()
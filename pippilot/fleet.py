@@ -0,0 +1,69 @@
+# fleet.py
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from .pipmanager import get_installed_packages, normalize_name
+from .tracing import span
+
+def scan_environment(interpreter):
+    # runs in a worker process; each process keeps its own scanner cache
+    return get_installed_packages(interpreter)
+
+def scan_fleet(interpreters, lookup, max_workers=None, on_scanned=None):
+    # Environments are scanned in a process pool. Each distinct project name is handed to the lookup
+    # pool the first time any environment reports it, so N environments sharing requests still
+    # cost one index request, and lookups overlap with the remaining scans.
+    # on_scanned(interpreter, packages, error) fires as each scan finishes.
+    scans, lookups = {}, {}
+    workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(workers, max(1, len(interpreters)))) as procs, \
+            ThreadPoolExecutor(max_workers=lookup.max_workers) as threads:
+        with span("fleet_scan", environments=len(interpreters)):
+            futures = {procs.submit(scan_environment, interpreter): interpreter for interpreter in interpreters}
+            for future in as_completed(futures):
+                interpreter = futures[future]
+                try:
+                    packages, error = future.result(), None
+                    if not packages:
+                        error = "no packages found"
+                except Exception as e:
+                    packages, error = {}, str(e) or type(e).__name__
+                scans[interpreter] = (packages, error)
+                for name in packages:
+                    key = normalize_name(name)
+                    if key not in lookups:
+                        lookups[key] = threads.submit(lookup.latest_version, name)
+                if on_scanned:
+                    on_scanned(interpreter, packages, error)
+        with span("fleet_lookups", packages=len(lookups)):
+            latest = {}
+            for key, future in lookups.items():
+                try:
+                    latest[key] = future.result()
+                except Exception:
+                    latest[key] = None
+    if lookup.cache:
+        lookup.cache.save()
+    return aggregate(scans, latest)
+
+def aggregate(scans, latest):
+    # scans: {interpreter: (packages, error)}, latest: {normalized name: version or None}
+    environments, outdated = [], {}
+    for interpreter in sorted(scans):
+        packages, error = scans[interpreter]
+        count = 0
+        for name, version in packages.items():
+            key = normalize_name(name)
+            newest = latest.get(key)
+            if newest is None or newest == version:
+                continue
+            count += 1
+            entry = outdated.setdefault(key, {"name": name, "latest": newest, "installed": {}})
+            entry["installed"].setdefault(version, []).append(interpreter)
+        environments.append({"python": interpreter, "packages": len(packages), "outdated": count, "error": error})
+    return {
+        "environments": environments,
+        # the projects spread over the most environments first
+        "outdated": sorted(outdated.values(), key=lambda e: (-sum(map(len, e["installed"].values())), e["name"].lower())),
+        "lookups": len(latest),
+        "failed_lookups": sum(1 for v in latest.values() if v is None),
+    }
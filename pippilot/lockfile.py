@@ -0,0 +1,56 @@
+# lockfile.py
+import os, re, time
+from .pipmanager import diff_packages, normalize_name, requirement_name
+
+HEADER = "# pippilot lock"
+_PIN = re.compile(r"^\s*([^\s\[<>=!~;@#]+)(\[[^\]]*\])?\s*(==\s*([^\s;#]+))?")
+
+def format_lock(packages, interpreter=None):
+    # a pinned requirements file: pip install -r takes it as is
+    lines = [f"{HEADER} · {interpreter or 'unknown interpreter'} · {time.strftime('%Y-%m-%d %H:%M:%S')}"]
+    lines += [f"{name}=={version}" for name, version in sorted(packages.items(), key=lambda kv: normalize_name(kv[0]))]
+    return "\n".join(lines) + "\n"
+
+def write_lock(packages, path, interpreter=None):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(format_lock(packages, interpreter))
+    os.replace(tmp, path)
+
+def read_lock(path):
+    # {name: version}; a requirement without an exact pin maps to None (any version will do).
+    # Options (-r, --index-url, ...), comments and URLs without a name are skipped.
+    packages = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split(" #", 1)[0].strip()
+            if not line or line.startswith(("#", "-")):
+                continue
+            match = _PIN.match(line)
+            if match and requirement_name(match.group(1)):
+                packages[match.group(1)] = match.group(4)
+    return packages
+
+def diff(current, wanted):
+    # what has to change in `current` to match `wanted`, both {name: version}:
+    # {"install": {name: version}, "remove": {name: version}, "change": {name: (installed, wanted)}}
+    changes = diff_packages(current, wanted)
+    installed = {normalize_name(n): v for n, v in current.items()}
+    return {
+        "install": changes["added"],
+        "remove": changes["removed"],
+        "change": {name: (installed[normalize_name(name)], version)
+                   for name, version in changes["changed"].items() if version is not None},
+    }
+
+def restore_specs(changes):
+    # the requirements for a single pip install that applies install + change
+    wanted = {**changes["install"], **{name: new for name, (_, new) in changes["change"].items()}}
+    return [f"{name}=={version}" if version else name for name, version in sorted(wanted.items(), key=lambda kv: kv[0].lower())]
+
+def direction(installed, wanted):
+    from packaging.version import Version, InvalidVersion
+    try:
+        return "upgrade" if Version(wanted) > Version(installed) else "downgrade"
+    except InvalidVersion:
+        return "change"
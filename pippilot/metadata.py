@@ -0,0 +1,149 @@
+# metadata.py
+import os
+from concurrent.futures import ThreadPoolExecutor
+from .pipmanager import get_scanner, normalize_name
+from .depgraph import DependencyIndex
+
+_MULTI_FIELDS = ("Requires-Dist", "Classifier", "Project-URL")
+
+def _metadata_file(dist):
+    path = dist["path"]
+    if not os.path.isdir(path):
+        return path
+    return os.path.join(path, "METADATA" if path.endswith(".dist-info") else "PKG-INFO")
+
+def _read_headers(path):
+    headers = {}
+    last = None
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if not line.strip():
+                break
+            if line[0] in " \t" and last:
+                # continuation line (e.g. a multi-line License field)
+                if isinstance(headers[last], str):
+                    headers[last] += "\n" + line.strip()
+                continue
+            key, sep, value = line.partition(":")
+            if not sep:
+                continue
+            last = key
+            if key in _MULTI_FIELDS:
+                headers.setdefault(key, []).append(value.strip())
+            elif key not in headers:
+                headers[key] = value.strip()
+    return headers
+
+def _egg_requires(path):
+    # egg-info keeps dependencies in requires.txt; everything after the first [section] is an extra
+    requires = []
+    try:
+        with open(os.path.join(path, "requires.txt"), encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("["):
+                    break
+                if line and not line.startswith("#"):
+                    requires.append(line)
+    except OSError:
+        pass
+    return requires
+
+def _license(headers):
+    if headers.get("License-Expression"):
+        return headers["License-Expression"]
+    license = headers.get("License", "")
+    if license and license != "UNKNOWN" and "\n" not in license and len(license) < 80:
+        return license
+    classifiers = [c.rsplit("::", 1)[-1].strip() for c in headers.get("Classifier", []) if c.startswith("License ::")]
+    return ", ".join(classifiers) or license.split("\n", 1)[0]
+
+def _home_page(headers):
+    if headers.get("Home-page"):
+        return headers["Home-page"]
+    urls = [url.partition(",") for url in headers.get("Project-URL", [])]
+    for label, _, url in urls:
+        if normalize_name(label) in ("homepage", "home", "source", "repository"):
+            return url.strip()
+    return urls[0][2].strip() if urls else ""
+
+def read_info(dist):
+    try:
+        headers = _read_headers(_metadata_file(dist))
+    except OSError:
+        headers = {}
+    specs = headers.get("Requires-Dist")
+    if specs is None and os.path.isdir(dist["path"]) and dist["path"].endswith(".egg-info"):
+        specs = _egg_requires(dist["path"])
+    return {
+        "name": dist["name"],
+        "version": dist["version"],
+        "summary": headers.get("Summary", dist.get("summary", "")),
+        "home_page": _home_page(headers),
+        "author": headers.get("Author") or headers.get("Author-email", ""),
+        "license": _license(headers),
+        "requires_python": headers.get("Requires-Python", ""),
+        "location": dist["location"],
+        "requirements": list(specs or []),  # as written, markers and extras included
+    }
+
+class MetadataService:
+    # Reads package details straight from the installed metadata files. Results are stored on the
+    # scanner's dist records, which the scanner reuses while an entry is unchanged, so a rescan
+    # keeps everything that is still valid and drops the rest.
+    def __init__(self, interpreter, max_workers=2):
+        self.scanner = get_scanner(interpreter)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.deps = DependencyIndex(interpreter)
+
+    def _dist(self, name):
+        return self.scanner.dists.get(normalize_name(name))
+
+    def _info(self, dist):
+        info = dist.get("info")
+        if info is None:
+            info = dist["info"] = read_info(dist)
+        return info
+
+    def dependencies(self):
+        # the dependency index, brought up to date with the latest scan
+        self.deps.sync(self.scanner.dists, self._info)
+        return self.deps
+
+    def get(self, name, sync=True):
+        # sync=False answers from the index as last synced, for callers that sync it in the background
+        dist = self._dist(name)
+        if dist is None:
+            return None
+        deps = self.dependencies() if sync else self.deps
+        # both directions come from the index, which evaluates markers for this interpreter
+        return dict(self._info(dist), requires=deps.requires(name), required_by=deps.required_by(name),
+                    dependencies=deps.closure([name]))
+
+    def prefetch(self, names):
+        dists = [d for d in map(self._dist, names) if d is not None and "info" not in d]
+        if dists:
+            self._pool.submit(lambda: [self._info(d) for d in dists])
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+def format_info(info, latest=None):
+    version = info["version"]
+    if latest and latest != version:
+        version += f" (latest: {latest})"
+    lines = [
+        ("Name", info["name"]),
+        ("Version", version),
+        ("Summary", info["summary"]),
+        ("Home-page", info["home_page"]),
+        ("Author", info["author"]),
+        ("License", info["license"]),
+        ("Requires-Python", info["requires_python"]),
+        ("Location", info["location"]),
+        ("Requires", ", ".join(info["requires"])),
+        ("Required-by", ", ".join(info["required_by"])),
+        ("All dependencies", f"{len(info['dependencies'])} installed: {', '.join(info['dependencies'])}"
+                             if info["dependencies"] else ""),
+    ]
+    return [f"{key}: {value}" for key, value in lines]
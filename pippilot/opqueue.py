@@ -0,0 +1,117 @@
+# opqueue.py
+import os, json, hashlib, uuid
+from .cache import default_cache_dir
+from .pipmanager import normalize_name, requirement_name
+
+INSTALL, UNINSTALL = "install", "uninstall"
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+STATUS_ICONS = {PENDING: "⏳", RUNNING: "🔄", DONE: "✅", FAILED: "❌", CANCELLED: "⛔"}
+
+def pip_command(interpreter, action, packages, find_links=None, requirements=None, upgrade=True):
+    # requirements: a file listing the packages instead, for batches too long for a command line;
+    # upgrade=False leaves an installed package alone, as a plain `pip install` does
+    targets = ["-r", requirements] if requirements else packages
+    if action == UNINSTALL:
+        return [interpreter, "-m", "pip", "uninstall", "-y", *targets]
+    # pip's own HTTP/wheel cache stays on; find_links points at prefetched wheels (see wheelhouse.py)
+    extra = ["--find-links", find_links] if find_links else []
+    flags = ["--upgrade"] if upgrade else []
+    return [interpreter, "-m", "pip", "install", *flags, *targets, *extra, "--disable-pip-version-check"]
+
+class Operation:
+    def __init__(self, action, package, op_id=None, status=PENDING, restore=False):
+        self.id = op_id or uuid.uuid4().hex
+        self.action = action
+        self.package = package
+        self.status = status
+        self.restore = restore  # part of matching a lock file: batched only with its own kind
+        self.key = normalize_name(requirement_name(package))  # a replacing spec names the same package
+
+    def label(self):
+        verb = "uninstall" if self.action == UNINSTALL else "install/update"
+        return f"{STATUS_ICONS[self.status]} {verb} {self.package}"
+
+    def to_dict(self):
+        return {"id": self.id, "action": self.action, "package": self.package, "status": self.status, "restore": self.restore}
+
+class OperationQueue:
+    def __init__(self, interpreter, path=None):
+        digest = hashlib.sha1(interpreter.encode()).hexdigest()[:12]
+        self.path = path or os.path.join(default_cache_dir(), f"queue-{digest}.json")
+        self.items = []
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for item in data:
+            # anything left running belongs to a session that exited mid-operation
+            status = PENDING if item["status"] == RUNNING else item["status"]
+            self.items.append(Operation(item["action"], item["package"], item["id"], status, item.get("restore", False)))
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump([op.to_dict() for op in self.items], f)
+        except OSError:
+            pass
+
+    def get(self, op_id):
+        return next((op for op in self.items if op.id == op_id), None)
+
+    def enqueue(self, action, package):
+        return self.enqueue_many(action, [package])[0]
+
+    def enqueue_many(self, action, packages, restore=False):
+        pending = {op.key: op for op in self.items if op.status == PENDING and op.action == action}
+        ops = []
+        for package in packages:
+            op = Operation(action, package, restore=restore)
+            if op.key in pending:
+                op = pending[op.key]
+                op.package = package  # a newer spec (e.g. a pinned version) replaces the queued one
+                op.restore = restore
+            else:
+                pending[op.key] = op
+                self.items.append(op)
+            ops.append(op)
+        return ops
+
+    def remove(self, op_id):
+        self.items = [op for op in self.items if op.id != op_id or op.status == RUNNING]
+
+    def move(self, op_id, delta):
+        op = self.get(op_id)
+        if op is None:
+            return
+        i = self.items.index(op)
+        j = max(0, min(len(self.items) - 1, i + delta))
+        self.items.insert(j, self.items.pop(i))
+
+    def clear_finished(self):
+        self.items = [op for op in self.items if op.status not in (DONE, FAILED, CANCELLED)]
+
+    def set_status(self, op_id, status):
+        op = self.get(op_id)
+        if op:
+            op.status = status
+
+    def next_batch(self):
+        # Merge every pending operation of the first pending action (and kind) into one pip call,
+        # skipping packages that an earlier pending operation of another action touches.
+        pending = [op for op in self.items if op.status == PENDING]
+        if not pending:
+            return []
+        action, restore = pending[0].action, pending[0].restore
+        batch, seen, blocked = [], set(), set()
+        for op in pending:
+            if op.action == action and op.restore == restore and op.key not in blocked and op.key not in seen:
+                batch.append(op)
+                seen.add(op.key)
+            else:
+                blocked.add(op.key)
+        return batch
@@ -0,0 +1,143 @@
+# pipmanager.py
+import subprocess, json, re, os, shutil, threading
+
+_SYS_PATH_SNIPPET = "import sys, json; print(json.dumps(sys.path))"
+_METADATA_FIELDS = ("Name", "Version", "Summary", "Keywords")
+
+def normalize_name(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def _pip_list(interpreter):
+    result = subprocess.run(
+        [interpreter, "-m", "pip", "list", "--format=json", "--disable-pip-version-check", "--no-cache-dir"],
+        capture_output=True, text=True
+    )
+    try:
+        return {pkg['name']: pkg['version'] for pkg in json.loads(result.stdout)}
+    except:
+        return {}
+
+def _read_metadata(path):
+    # Only the header block is needed; stop at the first blank line (the description body follows it)
+    meta = {}
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if not line.strip():
+                break
+            key, sep, value = line.partition(":")
+            if sep and key in _METADATA_FIELDS and key not in meta:
+                meta[key] = value.strip()
+    return meta
+
+def _parse_entry(location, entry_name, is_dir):
+    path = os.path.join(location, entry_name)
+    if not is_dir:
+        metadata = path
+    elif entry_name.endswith(".dist-info"):
+        metadata = os.path.join(path, "METADATA")
+    else:
+        metadata = os.path.join(path, "PKG-INFO")
+    try:
+        meta = _read_metadata(metadata)
+    except OSError:
+        return None
+    stem = entry_name.rsplit(".", 1)[0]
+    name = meta.get("Name") or stem.split("-", 1)[0]
+    version = meta.get("Version") or (stem.split("-")[1] if "-" in stem else "")
+    return {
+        "name": name, "version": version, "path": path, "location": location,
+        "summary": meta.get("Summary", ""), "keywords": meta.get("Keywords", ""),
+    }
+
+class PackageScanner:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.sys_path = None
+        self.dists = {}
+        self._dir_mtimes = {}
+        self._entries = {}  # entry path -> ((mtime_ns, inode), dist)
+        self._lock = threading.Lock()
+
+    def _probe_sys_path(self):
+        result = subprocess.run(
+            [self.interpreter, "-c", _SYS_PATH_SNIPPET],
+            capture_output=True, text=True, timeout=30
+        )
+        self.sys_path = [p for p in json.loads(result.stdout) if p and os.path.isdir(p)]
+
+    def _scan_once(self):
+        dists = {}
+        entries = {}
+        dir_mtimes = {}
+        for location in self.sys_path:
+            try:
+                dir_mtimes[location] = os.stat(location).st_mtime_ns
+                it = os.scandir(location)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    if not entry.name.endswith((".dist-info", ".egg-info")):
+                        continue
+                    try:
+                        st = entry.stat()
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    key = (st.st_mtime_ns, st.st_ino)
+                    cached = self._entries.get(entry.path)
+                    if cached and cached[0] == key:
+                        dist = cached[1]
+                    else:
+                        dist = _parse_entry(location, entry.name, is_dir)
+                    if dist is None:
+                        continue
+                    entries[entry.path] = (key, dist)
+                    # first match on sys.path wins, like importlib.metadata
+                    dists.setdefault(normalize_name(dist["name"]), dist)
+        return dists, entries, dir_mtimes
+
+    def scan(self):
+        with self._lock:
+            if self.sys_path is None:
+                self._probe_sys_path()
+            dists, entries, dir_mtimes = self._scan_once()
+            if self._dir_mtimes and dir_mtimes != self._dir_mtimes:
+                # a changed directory may have gained or lost a .pth file, which can alter sys.path
+                old_path = self.sys_path
+                self._probe_sys_path()
+                if self.sys_path != old_path:
+                    dists, entries, dir_mtimes = self._scan_once()
+            self._entries = entries
+            self._dir_mtimes = dir_mtimes
+            self.dists = dists
+            return dists
+
+_scanners = {}
+_scanners_lock = threading.Lock()
+
+def get_scanner(interpreter):
+    key = shutil.which(interpreter) or interpreter
+    with _scanners_lock:
+        if key not in _scanners:
+            _scanners[key] = PackageScanner(key)
+        return _scanners[key]
+
+def get_installed_packages(interpreter):
+    try:
+        dists = get_scanner(interpreter).scan()
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return _pip_list(interpreter)
+    return {d["name"]: d["version"] for d in dists.values()}
+
+def diff_packages(before, after):
+    old = {normalize_name(n): (n, v) for n, v in before.items()}
+    new = {normalize_name(n): (n, v) for n, v in after.items()}
+    return {
+        "added": dict(new[k] for k in new.keys() - old.keys()),
+        "removed": dict(old[k] for k in old.keys() - new.keys()),
+        "changed": dict(new[k] for k in new.keys() & old.keys() if new[k][1] != old[k][1]),
+    }
+
+def requirement_name(spec):
+    return re.split(r"[\s\[<>=!~;@]", spec.strip(), maxsplit=1)[0]
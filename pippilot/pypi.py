@@ -0,0 +1,336 @@
+# pypi.py
+import os, json, time, codecs, threading
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urlsplit, unquote
+from urllib.request import url2pathname
+from .cache import format_bytes
+from .tracing import span
+from .tasks import Cancelled
+from .pipmanager import normalize_name
+
+INDEX_URL = "https://pypi.org/pypi"
+MAX_WORKERS = 16
+PER_HOST_LIMIT = 8
+CHUNK_SIZE = 16 * 1024
+DRAIN_LIMIT = 64 * 1024
+SLOT_POLL = 0.1  # how often a lookup waiting for a connection slot checks for cancellation
+SIMPLE_ACCEPT = "application/vnd.pypi.simple.v1+json, application/vnd.pypi.simple.v1+html;q=0.2, text/html;q=0.1"
+
+def default_index_url():
+    return os.environ.get("PIPPILOT_INDEX_URL") or INDEX_URL
+
+class _JsonStream:
+    # Decodes one value at a time from a chunk iterator, reading only as far as needed.
+    # The buffer is grown geometrically so a large value that has to be skipped is still parsed in linear time.
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, need=1):
+        if self.eof:
+            raise ValueError("unexpected end of JSON document")
+        parts = [self.buf[self.pos:]]
+        have = len(parts[0])
+        while have < need:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self.eof = True
+                parts.append(self._text.decode(b"", final=True))
+                break
+            parts.append(self._text.decode(chunk))
+            have += len(parts[-1])
+        self.buf = "".join(parts)
+        self.pos = 0
+
+    def peek(self):
+        while True:
+            n = len(self.buf)
+            while self.pos < n and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < n:
+                return self.buf[self.pos]
+            self._fill()
+
+    def expect(self, chars):
+        c = self.peek()
+        if c not in chars:
+            raise ValueError(f"expected one of {chars!r}, got {c!r}")
+        self.pos += 1
+        return c
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+                # a number at the very end of the buffer may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(2 * (len(self.buf) - self.pos) + CHUNK_SIZE)
+
+    def members(self):
+        # yields the keys of an object; the caller consumes each member's value before resuming
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.expect(",}") == "}":
+                return
+
+    def items(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+class _LinkParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.filenames = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "a" and attrs.get("href") and "data-yanked" not in attrs:
+            # PEP 503: the link text matches the last path component of the URL
+            self.filenames.append(unquote(urlsplit(attrs["href"]).path.rsplit("/", 1)[-1]))
+
+def _info_version(chunks):
+    # Warehouse's JSON API puts "info" first, so the release listing after it is never parsed
+    stream = _JsonStream(chunks)
+    for key in stream.members():
+        if key == "info":
+            return stream.value()["version"]
+        stream.value()
+    raise ValueError("response has no 'info' member")
+
+def _json_filenames(chunks):
+    stream = _JsonStream(chunks)
+    for key in stream.members():
+        if key != "files":
+            stream.value()
+            continue
+        for item in stream.items():
+            if item.get("yanked") in (None, False):
+                yield item["filename"]
+
+def _html_filenames(chunks):
+    parser = _LinkParser()
+    text = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in chunks:
+        parser.feed(text.decode(chunk))
+        yield from parser.filenames
+        parser.filenames.clear()
+    parser.close()
+    yield from parser.filenames
+
+def _latest(filenames):
+    # packaging is imported on the first parse rather than with the module, which is on the GUI's startup path
+    from packaging.utils import parse_wheel_filename, parse_sdist_filename, InvalidWheelFilename, InvalidSdistFilename
+    from packaging.version import InvalidVersion
+    versions = {}
+    for filename in filenames:
+        try:
+            if filename.endswith(".whl"):
+                versions.setdefault(parse_wheel_filename(filename)[1], filename.split("-")[1])
+                continue
+            version = parse_sdist_filename(filename)[1]
+        except (InvalidWheelFilename, InvalidSdistFilename, InvalidVersion):
+            continue
+        stem = filename[:-4] if filename.endswith(".zip") else filename[:-7]
+        versions.setdefault(version, stem.rpartition("-")[2])
+    if not versions:
+        raise ValueError("no installable files listed")
+    stable = [v for v in versions if not v.is_prerelease]
+    return versions[max(stable or versions)]
+
+def _timed(chunks, waited):
+    # accumulates the time spent waiting for data so parse time can be reported on its own
+    it = iter(chunks)
+    while True:
+        start = time.perf_counter()
+        chunk = next(it, None)
+        waited[0] += time.perf_counter() - start
+        if chunk is None:
+            return
+        yield chunk
+
+class LookupEngine:
+    def __init__(self, index_url=None, max_workers=MAX_WORKERS, per_host_limit=PER_HOST_LIMIT, timeout=5, cache=None):
+        index_url = index_url or default_index_url()
+        if os.path.isdir(index_url):
+            index_url = Path(index_url).resolve().as_uri()
+        self.index_url = index_url.rstrip("/")
+        # ".../pypi" is the Warehouse JSON API; anything else is treated as a PEP 691/503 simple index
+        self.legacy_json = urlsplit(self.index_url).path.endswith("/pypi")
+        self.cache = cache
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self._session = None
+        self._host_slots = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def session(self):
+        # requests (and urllib3, certifi, ...) is imported on first use: a cached or file:// lookup
+        # never needs it, and it is a good part of the GUI's startup time
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+                self._session.mount("https://", adapter)
+                self._session.mount("http://", adapter)
+            return self._session
+
+    def reset_stats(self):
+        self.stats = {"requests": 0, "bytes": 0, "parse_time": 0.0}
+        if self.cache:
+            self.cache.reset_stats()
+
+    def _record(self, size, parse_time):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += size
+            self.stats["parse_time"] += parse_time
+
+    def summary(self):
+        s = self.stats
+        index = (f"Index: {s['requests']} requests, {format_bytes(s['bytes'])} transferred, "
+                 f"{s['parse_time'] * 1000:.0f} ms parsing")
+        return f"{self.cache.summary()} · {index}" if self.cache else index
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def _project_url(self, name):
+        project = normalize_name(name)
+        return f"{self.index_url}/{project}/json" if self.legacy_json else f"{self.index_url}/{project}/"
+
+    def _parse(self, chunks, content_type):
+        if self.legacy_json:
+            return _info_version(chunks)
+        if "json" in content_type:
+            return _latest(_json_filenames(chunks))
+        return _latest(_html_filenames(chunks))
+
+    def _read_local(self, url):
+        # a static-file index on disk: <root>/<project>/index.json or index.html
+        path = url2pathname(urlsplit(url).path)
+        if os.path.isdir(path):
+            path = next((os.path.join(path, f) for f in ("index.json", "index.html")
+                         if os.path.isfile(os.path.join(path, f))), os.path.join(path, "index.html"))
+        waited = [0.0]
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            latest = self._parse(_timed(iter(lambda: f.read(CHUNK_SIZE), b""), waited),
+                                 "json" if path.endswith(".json") else "html")
+            size = f.tell()
+        return latest, size, time.perf_counter() - start - waited[0]
+
+    def _read_remote(self, url, headers, entry, token=None):
+        if not self.legacy_json:
+            headers["Accept"] = SIMPLE_ACCEPT
+        with span("host_slot"):
+            slot = self._host_slot(url)
+            while not slot.acquire(timeout=SLOT_POLL):
+                if token:
+                    token.check()
+        remove = None
+        try:
+            if token:
+                token.check()
+            # connect (DNS, TLS) plus server latency, up to the response headers
+            request = span("request", url=url)
+            with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as res:
+                request.set(status=res.status_code)
+                request.end()
+                # cancelling closes the socket under a read in progress
+                remove = token.on_cancel(res.close) if token else None
+                if res.status_code == 304 and entry:
+                    self._record(res.raw.tell(), 0.0)
+                    return None
+                res.raise_for_status()
+                waited = [0.0]
+                start = time.perf_counter()
+                latest = self._parse(_timed(res.iter_content(CHUNK_SIZE), waited), res.headers.get("Content-Type", ""))
+                parse_time = time.perf_counter() - start - waited[0]
+                # finish small bodies so the connection goes back to the pool; abandon large ones
+                length = res.headers.get("Content-Length")
+                if length and int(length) - res.raw.tell() <= DRAIN_LIMIT:
+                    while res.raw.read(CHUNK_SIZE):
+                        pass
+                etag, last_modified = res.headers.get("ETag"), res.headers.get("Last-Modified")
+                return latest, res.raw.tell(), parse_time, etag, last_modified
+        finally:
+            if remove:
+                remove()
+            slot.release()
+
+    def latest_version(self, name, token=None):
+        # token: a tasks.CancelToken; cancelling it aborts the request and raises Cancelled
+        with span("lookup", package=name) as s:
+            try:
+                return self._latest_version(name, s, token)
+            except Exception:
+                if token and token.cancelled:
+                    raise Cancelled() from None
+                raise
+
+    def _latest_version(self, name, s, token):
+        entry = self.cache.get(name) if self.cache else None
+        if entry and entry["data"].get("index") != self.index_url:
+            entry = None  # cached from a different index
+        if entry and self.cache.is_fresh(entry):
+            self.cache.hit(entry)
+            s.set(source="cache")
+            return entry["data"]["version"]
+
+        url = self._project_url(name)
+        etag = last_modified = None
+        if url.startswith("file:"):
+            latest, size, parse_time = self._read_local(url)
+        else:
+            headers = {}
+            if entry and entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry and entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            result = self._read_remote(url, headers, entry, token)
+            if result is None:
+                self.cache.revalidated(entry)
+                s.set(source="revalidated")
+                return entry["data"]["version"]
+            latest, size, parse_time, etag, last_modified = result
+        self._record(size, parse_time)
+        s.set(source="index", bytes=size, parse_ms=round(parse_time * 1000, 3))
+        if self.cache:
+            self.cache.put(name, {"version": latest, "index": self.index_url}, etag, last_modified, size)
+        return latest
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
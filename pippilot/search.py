@@ -0,0 +1,101 @@
+# search.py
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from .pipmanager import normalize_name
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+def _trigrams(text):
+    text = f" {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _words(*texts):
+    return {w for text in texts if text for w in _WORD.findall(text.lower())}
+
+def index_entries(names, dists):
+    # (name, summary, keywords) for each name, taken from scanned dist metadata
+    for name in names:
+        dist = dists.get(normalize_name(name), {})
+        yield name, dist.get("summary", ""), dist.get("keywords", "")
+
+class SearchIndex:
+    def __init__(self, entries=()):
+        self.names = {}                     # normalized name -> display name
+        self.docs = {}                      # normalized name -> set of summary/keyword words
+        self.grams = defaultdict(set)       # name trigram -> normalized names
+        self.word_postings = defaultdict(set)
+        self._sorted_words = None
+        for name, summary, keywords in entries:
+            self.add(name, summary, keywords)
+
+    def add(self, name, summary="", keywords=""):
+        key = normalize_name(name)
+        if key in self.names:
+            self.remove(name)
+        self.names[key] = name
+        for gram in _trigrams(key):
+            self.grams[gram].add(key)
+        words = _words(summary, keywords.replace(",", " ") if keywords else "")
+        self.docs[key] = words
+        for word in words:
+            self.word_postings[word].add(key)
+        self._sorted_words = None
+
+    def remove(self, name):
+        key = normalize_name(name)
+        if self.names.pop(key, None) is None:
+            return
+        for gram in _trigrams(key):
+            self.grams[gram].discard(key)
+        for word in self.docs.pop(key):
+            self.word_postings[word].discard(key)
+        self._sorted_words = None
+
+    def _words_with_prefix(self, prefix):
+        if self._sorted_words is None:
+            self._sorted_words = sorted(w for w, keys in self.word_postings.items() if keys)
+        words = self._sorted_words
+        i = bisect_left(words, prefix)
+        while i < len(words) and words[i].startswith(prefix):
+            yield words[i]
+            i += 1
+
+    def search(self, query):
+        # Returns {normalized name: score}; higher is better
+        query = normalize_name(query.strip())
+        if not query:
+            return None
+        scores = {}
+        if len(query) < 3:
+            for key in self.names:
+                if key.startswith(query):
+                    scores[key] = 500
+                elif query in key:
+                    scores[key] = 300
+        else:
+            grams = _trigrams(query)
+            counts = defaultdict(int)
+            for gram in grams:
+                for key in self.grams.get(gram, ()):
+                    counts[key] += 1
+            for key, n in counts.items():
+                if key == query:
+                    scores[key] = 1000
+                elif key.startswith(query):
+                    scores[key] = 500
+                elif query in key:
+                    scores[key] = 300
+                elif n / len(grams) >= 0.5:
+                    scores[key] = int(200 * n / max(len(grams), len(_trigrams(key))))
+        # summary and keyword matches rank below any name match
+        for term in _WORD.findall(query):
+            if len(term) < 3:
+                continue
+            best = {}
+            for word in self._words_with_prefix(term):
+                for key in self.word_postings[word]:
+                    best[key] = max(best.get(key, 0), 50 if word == term else 25)
+            for key, score in best.items():
+                scores[key] = scores.get(key, 0) + score
+        return scores
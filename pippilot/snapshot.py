@@ -0,0 +1,55 @@
+# snapshot.py
+import os, json, time, hashlib
+from .cache import default_cache_dir
+from .engine import PackageStatus
+from .pipmanager import normalize_name
+
+FORMAT = 1
+
+class Snapshot:
+    # The last package table shown for one interpreter, rendered at startup while a refresh
+    # revalidates it. Rows are stored as [name, version, latest, error, checked, advisories];
+    # `checked` is when that row's latest version last came back from a lookup.
+    def __init__(self, interpreter, path=None):
+        digest = hashlib.sha1(interpreter.encode()).hexdigest()[:12]
+        self.path = path or os.path.join(default_cache_dir(), f"snapshot-{digest}.json")
+        self.statuses = []
+        self.checked = {}  # normalized name -> timestamp
+        self.saved = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("format") != FORMAT:
+                return
+            for name, version, latest, error, checked, *advisories in data["rows"]:
+                advisories = tuple(advisories[0]) if advisories else ()
+                self.statuses.append(PackageStatus(name, version, latest == version, latest, error, advisories))
+                self.checked[normalize_name(name)] = checked
+            self.saved = data["saved"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self.statuses, self.checked = [], {}
+
+    def age(self):
+        return None if self.saved is None else time.time() - self.saved
+
+    def save(self, statuses, looked_up=None):
+        # statuses: the whole table; looked_up: the rows just checked against the index (default: all)
+        now = int(time.time())
+        fresh = {normalize_name(s.name) for s in (statuses if looked_up is None else looked_up)}
+        rows, checked = [], {}
+        for s in statuses:
+            key = normalize_name(s.name)
+            checked[key] = now if key in fresh else self.checked.get(key, now)
+            rows.append([s.name, s.version, s.latest, s.error, checked[key], list(s.advisories)])
+        self.statuses, self.checked, self.saved = list(statuses), checked, now
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"format": FORMAT, "saved": now, "rows": rows}, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
@@ -0,0 +1,82 @@
+# tasks.py
+import asyncio, threading
+
+class Cancelled(Exception):
+    pass
+
+class CancelToken:
+    # Cooperative cancellation shared between the UI thread, event loops and worker threads.
+    # Callbacks registered with on_cancel() run once, on the thread that calls cancel().
+    def __init__(self):
+        self._cancelled = False
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def check(self):
+        if self._cancelled:
+            raise Cancelled()
+
+    def on_cancel(self, callback):
+        # returns a function that unregisters the callback
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._discard(callback)
+        callback()
+        return lambda: None
+
+    def _discard(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def cancel(self):
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass  # e.g. the loop it would have woken has already closed
+
+async def run_cancellable(coro, token=None):
+    # awaits coro, cancelling it (and everything it awaits) as soon as token is cancelled
+    if token is None:
+        return await coro
+    loop = asyncio.get_running_loop()
+    task = asyncio.ensure_future(coro)
+    remove = token.on_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if token.cancelled:
+            raise Cancelled() from None
+        raise
+    finally:
+        remove()
+
+class Generations:
+    # One live generation of work at a time: start() cancels whatever the previous generation
+    # still has in flight, and is_current() tells late results apart from fresh ones.
+    def __init__(self):
+        self.current = 0
+        self.token = CancelToken()
+
+    def start(self):
+        self.token.cancel()
+        self.current += 1
+        self.token = CancelToken()
+        return self.current, self.token
+
+    def is_current(self, generation):
+        return generation == self.current
+
+    def cancel(self):
+        self.token.cancel()
@@ -0,0 +1,99 @@
+# tracing.py
+import os, json, time, threading
+from collections import deque
+from .cache import default_cache_dir
+
+MAX_EVENTS = 200_000
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+    def end(self):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    __slots__ = ("tracer", "name", "args", "start", "tid")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.tid = threading.get_ident()
+        self.start = time.perf_counter()
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def end(self):
+        if self.start is not None:
+            self.tracer._events.append((self.name, self.start, time.perf_counter() - self.start, self.tid, self.args))
+            self.start = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.end()
+        return False
+
+def _format(seconds):
+    if seconds < 0.01:
+        return f"{seconds * 1000:.1f} ms"
+    return f"{seconds * 1000:.0f} ms" if seconds < 1 else f"{seconds:.2f}s"
+
+class Tracer:
+    # When disabled, span() hands back one shared no-op object, so instrumented code pays a
+    # single attribute check. Spans can end on another thread than the one that started them.
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._events = deque(maxlen=MAX_EVENTS)
+        self._origin = time.perf_counter()
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, args)
+
+    def reset(self):
+        self._events.clear()
+
+    def summary(self, since=None):
+        stats = {}
+        for name, start, duration, _, _ in list(self._events):
+            if since is None or start >= since:
+                stats.setdefault(name, [start, []])[1].append(duration)
+        parts = []
+        for name, (_, durations) in sorted(stats.items(), key=lambda kv: kv[1][0]):
+            if len(durations) == 1:
+                parts.append(f"{name} {_format(durations[0])}")
+            else:
+                durations.sort()
+                parts.append(f"{name} ×{len(durations)} p50 {_format(durations[len(durations) // 2])} "
+                             f"max {_format(durations[-1])}")
+        return "Trace: " + (" · ".join(parts) if parts else "nothing recorded")
+
+    def export(self, path=None):
+        # Chrome trace-event format; open in chrome://tracing or https://ui.perfetto.dev
+        path = path or os.path.join(default_cache_dir(), "traces", time.strftime("pippilot-%Y%m%d-%H%M%S.json"))
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        pid = os.getpid()
+        events = [{
+            "name": name, "ph": "X", "pid": pid, "tid": tid,
+            "ts": round((start - self._origin) * 1e6, 1), "dur": round(duration * 1e6, 1),
+            "args": {k: v if isinstance(v, (int, float, bool, type(None))) else str(v) for k, v in args.items()},
+        } for name, start, duration, tid, args in list(self._events)]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+
+tracer = Tracer(enabled=os.environ.get("PIPPILOT_TRACE", "") not in ("", "0"))
+span = tracer.span
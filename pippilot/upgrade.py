@@ -0,0 +1,62 @@
+# upgrade.py
+import os, json, hashlib, subprocess, tempfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, unquote
+from urllib.request import url2pathname
+
+class ResolutionError(Exception):
+    pass
+
+def resolve_upgrade(interpreter, requirements, timeout=600):
+    # One resolver pass for the whole set; pip's --report describes exactly what would be installed
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = os.path.join(tmp, "report.json")
+        result = subprocess.run(
+            [interpreter, "-m", "pip", "install", "--upgrade", "--dry-run", "--quiet",
+             "--disable-pip-version-check", "--report", report_path, *requirements],
+            capture_output=True, text=True, timeout=timeout
+        )
+        if result.returncode != 0:
+            raise ResolutionError((result.stdout + result.stderr).strip())
+        with open(report_path, encoding="utf-8") as f:
+            report = json.load(f)
+    plan = []
+    for item in report.get("install", []):
+        info = item["download_info"]
+        plan.append({
+            "name": item["metadata"]["name"],
+            "version": item["metadata"]["version"],
+            "url": info["url"],
+            "archive": "archive_info" in info,
+            "sha256": info.get("archive_info", {}).get("hashes", {}).get("sha256"),
+        })
+    return plan
+
+def _fetch(session, item, dest):
+    url = item["url"]
+    if not item["archive"]:
+        return f"{item['name']} @ {url}"  # VCS or local directory: let pip handle it
+    parts = urlsplit(url)
+    if parts.scheme == "file":
+        return url2pathname(parts.path)
+    path = os.path.join(dest, unquote(os.path.basename(parts.path)))
+    digest = hashlib.sha256()
+    with session.get(url, stream=True, timeout=60) as res:
+        res.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in res.iter_content(1 << 16):
+                f.write(chunk)
+                digest.update(chunk)
+    if item["sha256"] and digest.hexdigest() != item["sha256"]:
+        raise ValueError(f"hash mismatch for {os.path.basename(path)}")
+    return path
+
+def fetch_artifacts(session, plan, dest, max_workers=8):
+    if not plan:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(plan))) as pool:
+        return list(pool.map(lambda item: _fetch(session, item, dest), plan))
+
+def install_command(interpreter, targets):
+    # --no-deps: the resolver already produced the complete set, install it as one transaction
+    return [interpreter, "-m", "pip", "install", "--no-deps", "--disable-pip-version-check", *targets]
@@ -0,0 +1,204 @@
+# wheelhouse.py
+import os, hashlib, tempfile, threading, subprocess
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from .cache import default_cache_dir
+from .pipmanager import normalize_name, requirement_name
+from .tracing import span
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+MAX_DOWNLOADS = 3
+DOWNLOAD_TIMEOUT = 600
+_TAGS_PROBE = (
+    "try:\n    from packaging.tags import sys_tags\n"
+    "except ImportError:\n    from pip._vendor.packaging.tags import sys_tags\n"
+    "t = next(iter(sys_tags())); print(f'{t.interpreter}-{t.abi}-{t.platform}')"
+)
+
+def _key(name, version):
+    from packaging.version import Version, InvalidVersion
+    try:
+        version = Version(version)
+    except InvalidVersion:
+        pass
+    return normalize_name(name), version
+
+def _wheel_key(filename):
+    from packaging.utils import parse_wheel_filename, InvalidWheelFilename
+    try:
+        name, version, _, _ = parse_wheel_filename(filename)
+    except InvalidWheelFilename:
+        return None
+    return _key(name, str(version))
+
+class Wheelhouse:
+    # Wheels for pending upgrades, downloaded ahead of time and handed to pip (see local_specs).
+    # Interpreters with the same most specific tag (e.g. cp311-cp311-manylinux_2_17_x86_64) share a
+    # directory unless shared=False. Least recently used wheels go first once max_bytes is exceeded;
+    # a wheel counts as used when it's downloaded or its project is installed.
+    def __init__(self, interpreter, root=None, max_bytes=DEFAULT_MAX_BYTES, shared=True, max_workers=MAX_DOWNLOADS):
+        self.interpreter = interpreter
+        self.root = root or os.path.join(default_cache_dir(), "wheelhouse")
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self._path = None
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._targets = {}  # normalized name -> version the last prefetch asked for
+        self._processes = set()  # pip downloads in flight, terminated by close()
+        self._closed = False
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    @classmethod
+    def from_env(cls, interpreter):
+        # PIPPILOT_WHEELHOUSE: "0" turns it off, "private" keeps one directory per interpreter
+        mode = os.environ.get("PIPPILOT_WHEELHOUSE", "")
+        if mode == "0":
+            return None
+        max_bytes = int(os.environ.get("PIPPILOT_WHEELHOUSE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        return cls(interpreter, max_bytes=max_bytes, shared=mode != "private")
+
+    def _dirname(self):
+        if self.shared:
+            try:
+                out = subprocess.run([self.interpreter, "-c", _TAGS_PROBE], capture_output=True, text=True, timeout=30)
+                if out.returncode == 0 and out.stdout.strip():
+                    return out.stdout.strip()
+            except (OSError, subprocess.SubprocessError):
+                pass
+        return "python-" + hashlib.sha1(os.path.abspath(self.interpreter).encode()).hexdigest()[:12]
+
+    @property
+    def path(self):
+        with self._lock:
+            if self._path is None:
+                self._path = os.path.join(self.root, self._dirname())
+                os.makedirs(self._path, exist_ok=True)
+            return self._path
+
+    def _wheels(self):
+        try:
+            with os.scandir(self.path) as it:
+                return [e for e in it if e.name.endswith(".whl") and e.is_file()]
+        except OSError:
+            return []
+
+    def wheel_for(self, name):
+        key = normalize_name(name)
+        target = self._targets.get(key)
+        if target is None:
+            return None
+        return next((e.path for e in self._wheels() if _wheel_key(e.name) == (key, target)), None)
+
+    def local_specs(self, specs):
+        # pip's resolver prefers an index link over an identical --find-links file, so a bare
+        # project name whose prefetched target is on disk is handed to pip as the wheel path
+        return [self.wheel_for(spec) or spec if requirement_name(spec) == spec.strip() else spec for spec in specs]
+
+    def touch(self, names):
+        keys = {normalize_name(n) for n in names}
+        for entry in self._wheels():
+            key = _wheel_key(entry.name)
+            if key and key[0] in keys:
+                try:
+                    os.utime(entry.path)
+                except OSError:
+                    pass
+
+    def evict(self):
+        wheels = []
+        for entry in self._wheels():
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            wheels.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in wheels)
+        for _, size, path in sorted(wheels):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def _download(self, name, version):
+        # into a scratch directory first, so a concurrent install never sees a half-written wheel
+        try:
+            with span("prefetch", package=name, version=version) as s, \
+                    tempfile.TemporaryDirectory(dir=self.path, prefix=".download-") as tmp:
+                with self._lock:
+                    if self._closed:
+                        return False
+                    process = subprocess.Popen(
+                        [self.interpreter, "-m", "pip", "download", f"{name}=={version}", "--no-deps",
+                         "--only-binary", ":all:", "--dest", tmp,
+                         "--disable-pip-version-check", "--quiet"],
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                    )
+                    self._processes.add(process)
+                try:
+                    returncode = process.wait(timeout=DOWNLOAD_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+                    return False
+                finally:
+                    with self._lock:
+                        self._processes.discard(process)
+                s.set(returncode=returncode)
+                if returncode != 0:
+                    return False
+                for filename in os.listdir(tmp):
+                    os.replace(os.path.join(tmp, filename), os.path.join(self.path, filename))
+            return True
+        except (OSError, subprocess.SubprocessError):
+            return False
+        finally:
+            with self._lock:
+                self._pending.discard(_key(name, version))
+
+    def prefetch(self, targets, on_done=None):
+        # targets: [(name, version)]; on_done(fetched) runs on a worker thread once the batch is finished
+        def start():
+            present = {_wheel_key(e.name) for e in self._wheels()}
+            batch = []
+            with self._lock:
+                for name, version in targets:
+                    key = _key(name, version)
+                    self._targets[key[0]] = key[1]
+                    if key not in present and key not in self._pending:
+                        self._pending.add(key)
+                        batch.append((name, version))
+            if batch:
+                try:
+                    futures = [self._pool.submit(self._download, name, version) for name, version in batch]
+                except RuntimeError:
+                    return  # closed meanwhile
+                fetched = []
+                for (name, _), future in zip(batch, futures):
+                    try:
+                        if future.result():
+                            fetched.append(name)
+                    except CancelledError:
+                        return
+                if self._closed:
+                    return
+                self.evict()
+                if on_done:
+                    on_done(fetched)
+
+        # probing the tags and listing the directory happen off the caller's thread too
+        threading.Thread(target=start, daemon=True).start()
+
+    def close(self):
+        # queued downloads are dropped and running ones stopped, so nothing outlives the caller
+        with self._lock:
+            self._closed = True
+            processes = list(self._processes)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            try:
+                process.terminate()
+            except OSError:
+                pass
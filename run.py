@@ -2,7 +2,6 @@
 import sys
 from PyQt6.QtWidgets import QApplication
 from landing import LandingDialog
-from main import GlobalPipPilot
 
 def main():
     app = QApplication(sys.argv)
@@ -12,6 +11,8 @@ def main():
     if not interpreter:
         sys.exit(0)
 
+    # imported after the picker, so the picker doesn't wait for the engine's imports
+    from main import GlobalPipPilot
     win = GlobalPipPilot(interpreter)
     win.show()
 